@@ -8,6 +8,90 @@ class Settings(BaseModel):
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY", "")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+
+    # Profile/role lookups
+    PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+
+    # Bulk testcase import
+    TESTCASE_IMPORT_BATCH_SIZE: int = int(os.getenv("TESTCASE_IMPORT_BATCH_SIZE", "100"))
+    # Largest batch_size a request may ask for (rows per insert)
+    TESTCASE_IMPORT_MAX_BATCH_SIZE: int = int(os.getenv("TESTCASE_IMPORT_MAX_BATCH_SIZE", "500"))
+    TESTCASE_IMPORT_SPOOL_BYTES: int = int(os.getenv("TESTCASE_IMPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+    TESTCASE_IMPORT_MAX_BYTES: int = int(os.getenv("TESTCASE_IMPORT_MAX_BYTES", str(256 * 1024 * 1024)))
+    # Largest uncompressed *.in / *.out file in a zip import
+    TESTCASE_IMPORT_MAX_MEMBER_BYTES: int = int(os.getenv("TESTCASE_IMPORT_MAX_MEMBER_BYTES", str(64 * 1024 * 1024)))
+
+    # Content-addressed blob storage for large testcase data
+    # "supabase" keeps blobs in Supabase Storage; "local" (BLOB_STORE_DIR) is for development
+    BLOB_BACKEND: str = os.getenv("BLOB_BACKEND", "supabase")
+    BLOB_STORAGE_BUCKET: str = os.getenv("BLOB_STORAGE_BUCKET", "testcase-blobs")
+    BLOB_STORE_DIR: str = os.getenv("BLOB_STORE_DIR", "data/blobs")
+    BLOB_CACHE_DIR: str = os.getenv("BLOB_CACHE_DIR", "data/blob-cache")
+    BLOB_CACHE_MAX_BYTES: int = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    BLOB_INLINE_LIMIT: int = int(os.getenv("BLOB_INLINE_LIMIT", str(64 * 1024)))
+
+    # Judging
+    # For problems without their own limits; 0 memory means no cap
+    DEFAULT_TIME_LIMIT_MS: int = int(os.getenv("DEFAULT_TIME_LIMIT_MS", "3000"))
+    DEFAULT_MEMORY_LIMIT_KB: int = int(os.getenv("DEFAULT_MEMORY_LIMIT_KB", "0"))
+    # Executor calls in flight across all workers; a slot held longer than the lease is freed
+    EXECUTOR_CONCURRENCY: int = int(os.getenv("EXECUTOR_CONCURRENCY", "4"))
+    EXECUTOR_SLOT_LEASE_SECONDS: int = int(os.getenv("EXECUTOR_SLOT_LEASE_SECONDS", "120"))
+    # Testcases of one submission running at once (each also takes an executor slot)
+    JUDGE_SUBMISSION_CONCURRENCY: int = int(os.getenv("JUDGE_SUBMISSION_CONCURRENCY", "2"))
+    JUDGE_FAIL_FAST: bool = os.getenv("JUDGE_FAIL_FAST", "false").lower() == "true"
+
+    # Deduplicated, compressed storage for submission code and outputs
+    CONTENT_CACHE_SIZE: int = int(os.getenv("CONTENT_CACHE_SIZE", "1000"))
+    # Texts up to this many bytes stay inline; a hash reference would cost more
+    CONTENT_INLINE_LIMIT: int = int(os.getenv("CONTENT_INLINE_LIMIT", "512"))
+    CONTENT_KNOWN_TTL_SECONDS: int = int(os.getenv("CONTENT_KNOWN_TTL_SECONDS", "86400"))
+
+    # Cache of compile/run outcomes for compiled languages
+    ARTIFACT_CACHE_ENABLED: bool = os.getenv("ARTIFACT_CACHE_ENABLED", "true").lower() == "true"
+    ARTIFACT_CACHE_DIR: str = os.getenv("ARTIFACT_CACHE_DIR", "data/artifact-cache")
+    ARTIFACT_CACHE_MAX_BYTES: int = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Multi-worker serving and shared state
+    SHARED_STATE_SOCKET: str = os.getenv("SHARED_STATE_SOCKET", "")
+    SHARED_STATE_MAX_ENTRIES: int = int(os.getenv("SHARED_STATE_MAX_ENTRIES", "100000"))
+
+    # Similarity (plagiarism) index
+    SIMILARITY_INDEX_TTL_SECONDS: int = int(os.getenv("SIMILARITY_INDEX_TTL_SECONDS", "600"))
+
+    # Background rejudge when testcases are added
+    REJUDGE_ON_TESTCASE_ADD: bool = os.getenv("REJUDGE_ON_TESTCASE_ADD", "true").lower() == "true"
+    # A worker's claim on a job; renewed at every checkpoint, taken over once it runs out
+    REJUDGE_LEASE_SECONDS: int = int(os.getenv("REJUDGE_LEASE_SECONDS", "600"))
+    # Wait before resuming a job the executor failed on (IE)
+    REJUDGE_RETRY_SECONDS: int = int(os.getenv("REJUDGE_RETRY_SECONDS", "300"))
+    REJUDGE_BATCH_SIZE: int = int(os.getenv("REJUDGE_BATCH_SIZE", "20"))
+    REJUDGE_RUNS_PER_SECOND: float = float(os.getenv("REJUDGE_RUNS_PER_SECOND", "2"))
+
+    # Leaderboard
+    LEADERBOARD_RECONCILE_SECONDS: int = int(os.getenv("LEADERBOARD_RECONCILE_SECONDS", "300"))
+
+    # Admin batch judging
+    BATCH_JUDGE_MAX_ENTRIES: int = int(os.getenv("BATCH_JUDGE_MAX_ENTRIES", "2000"))
+    # Capped below EXECUTOR_CONCURRENCY so live traffic always has a slot
+    BATCH_JUDGE_CONCURRENCY: int = int(os.getenv("BATCH_JUDGE_CONCURRENCY", "2"))
+    BATCH_JUDGE_WRITE_SIZE: int = int(os.getenv("BATCH_JUDGE_WRITE_SIZE", "50"))
+
+    # Response compression (brotli is used if the package is installed)
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # Startup warm-up and cached lookups
+    CATALOG_TTL_SECONDS: int = int(os.getenv("CATALOG_TTL_SECONDS", "60"))
+    WARMUP_TIMEOUT_SECONDS: int = int(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
+    WARMUP_EXECUTOR_SMOKE_TEST: bool = os.getenv("WARMUP_EXECUTOR_SMOKE_TEST", "false").lower() == "true"
+
+    # Per-request profiling (admins send X-Profile: 1; a fraction of requests can be sampled)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "data/profiles")
+    PROFILING_MAX_FILES: int = int(os.getenv("PROFILING_MAX_FILES", "200"))
     
     class Config:
         validate_assignment = True
@@ -1,9 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routes import problems, run, submit, auth, admin
+from app.routes import problems, run, submit, auth, admin, leaderboard, health
+from app.services.leaderboard import leaderboard as leaderboard_service
+from app.services.rejudge import rejudger
+from app.services.profiler import ProfilingMiddleware
+from app.services.responses import CompressionMiddleware
+from app.services.warmup import warmup
+from app.services.http_clients import close_all
+from app.config import settings
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="AlgoVerse API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open connections and preload lookups; /ready reports when done
+    warmer = asyncio.create_task(warmup.run())
+    # Keep leaderboard aggregates in sync with the database
+    reconciler = asyncio.create_task(
+        leaderboard_service.run_reconciler(settings.LEADERBOARD_RECONCILE_SECONDS)
+    )
+    # Resume unfinished rejudge jobs and pick up new ones
+    rejudge_worker = asyncio.create_task(rejudger.run_forever())
+    yield
+    reconciler.cancel()
+    rejudge_worker.cancel()
+    warmer.cancel()
+    await close_all()
+
+
+app = FastAPI(title="AlgoVerse API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -14,8 +42,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(problems.router)
 app.include_router(run.router)
 app.include_router(submit.router)
 app.include_router(auth.router)
 app.include_router(admin.router)
+app.include_router(leaderboard.router)
+app.include_router(health.router)
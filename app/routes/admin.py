@@ -1,9 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from app.routes.deps import require_admin, get_current_user
-from app.services.supabase import SupabaseClient
+from app.services.supabase import SupabaseClient, select
+from app.services.testcase_import import UploadTooLarge, aiter_zip, iter_ndjson, limit_size, spool_upload
+from app.services.blobs import testcase_fields, testcase_text
+from app.services.leaderboard import leaderboard
+from app.services.similarity import similarity_index
+from app.services.artifact_cache import artifact_cache
+from app.services.rejudge import rejudger
+from app.services.batch_judge import start_batch
+from app.services.responses import FastJSONResponse, dumps
+from app.services.catalog import catalog
+from app.services.content_store import content_store
+from app.services.profiles import invalidate_profile
+from app.services.profiler import list_profiles, profile_path
+from app.services import metrics
+from app.config import settings
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
+import asyncio
+import json
 import uuid
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -18,6 +35,28 @@ class ProblemCreate(BaseModel):
     tags: List[str] = []
 
 
+class RoleUpdate(BaseModel):
+    role: str
+
+
+class RejudgeRequest(BaseModel):
+    testcase_ids: List[str]
+
+
+class BatchJudgeEntry(BaseModel):
+    user_id: str
+    problem_id: str
+    language: str
+    code: str
+    ref: Optional[str] = None  # echoed back, to match results to entries
+
+
+class BatchJudgeRequest(BaseModel):
+    entries: List[BatchJudgeEntry]
+    update_progress: bool = True
+    include_results: bool = False
+
+
 class TestCaseCreate(BaseModel):
     problem_id: str
     input: str
@@ -30,43 +69,145 @@ class TestCaseCreate(BaseModel):
 async def get_stats(admin=Depends(require_admin)):
     """Get dashboard statistics"""
     try:
-        # Get counts
-        users = await sb_admin.get("profiles", {"role": "eq.coder", "select": "id"})
-        problems = await sb_admin.get("problems", {"select": "id"})
-        submissions = await sb_admin.get("submissions", {"select": "id,passed"})
-        
-        successful = len([s for s in submissions if s.get("passed")])
-        
+        # Get counts (counted by the database, no rows are transferred)
+        return {
+            "total_users": await sb_admin.count("profiles", {"role": "eq.coder"}),
+            "total_problems": await sb_admin.count("problems"),
+            "total_submissions": await sb_admin.count("submissions"),
+            "successful_submissions": await sb_admin.count("submissions", {"passed": "eq.true"})
+        }
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/metrics")
+async def get_metrics(admin=Depends(require_admin)):
+    """Get service counters (shared by all workers)"""
+    try:
+        return {"metrics": await metrics.snapshot()}
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/artifact-cache")
+async def get_artifact_cache_stats(admin=Depends(require_admin)):
+    """Get compile/run cache hit rate and disk usage"""
+    try:
+        return await artifact_cache.stats()
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/storage")
+async def get_storage_stats(admin=Depends(require_admin)):
+    """Get bytes saved by deduplicated, compressed code/output storage"""
+    try:
+        return await content_store.stats()
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/profiling")
+async def get_profiles(admin=Depends(require_admin)):
+    """List captured request profiles, newest first"""
+    try:
         return {
-            "total_users": len(users),
-            "total_problems": len(problems),
-            "total_submissions": len(submissions),
-            "successful_submissions": successful
+            "enabled": settings.PROFILING_ENABLED,
+            "profiles": await asyncio.to_thread(list_profiles),
         }
     except Exception as e:
         raise HTTPException(500, detail=str(e))
 
 
+@router.get("/profiling/{profile_id}")
+async def get_profile_spans(profile_id: str, admin=Depends(require_admin)):
+    """Get a profile's per-span (per-await) breakdown"""
+    path = profile_path(profile_id, "json")
+    if not path:
+        raise HTTPException(404, "Profile not found")
+    with open(path) as f:
+        return json.load(f)
+
+
+@router.get("/profiling/{profile_id}/download")
+async def download_profile(profile_id: str, admin=Depends(require_admin)):
+    """Download a profile's cProfile stats (.prof, readable with pstats/snakeviz)"""
+    path = profile_path(profile_id, "prof")
+    if not path:
+        raise HTTPException(404, "Profile has no cProfile stats")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
 @router.get("/users")
-async def get_all_users(admin=Depends(require_admin)):
-    """Get all users with their stats"""
+async def get_all_users(limit: int = 500, cursor: Optional[str] = None, admin=Depends(require_admin)):
+    """
+    Get a page of users with their stats
+    Pass the returned next_cursor to get the next page; it is None on the last one.
+    """
+    try:
+        # Totals come from the incrementally maintained leaderboard
+        await leaderboard.ensure_loaded()
+        limit = max(1, min(limit, 1000))
+
+        users = []
+        async for user in sb_admin.iter_rows(
+            "profiles",
+            {"role": "eq.coder", **select("id", "username", "display_name", "created_at")},
+            page_size=limit,
+            start_after=cursor,
+        ):
+            entry = leaderboard.rank(user["id"])
+            user["problems_solved"] = entry["solved"] if entry else 0
+            user["total_attempts"] = entry["attempts"] if entry else 0
+            users.append(user)
+            if len(users) == limit:
+                break
+
+        next_cursor = users[-1]["id"] if len(users) == limit else None
+        return {"users": users, "next_cursor": next_cursor}
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/submissions/{submission_id}/similar")
+async def get_similar_submissions(
+    submission_id: str,
+    k: int = 10,
+    include_same_user: bool = False,
+    admin=Depends(require_admin),
+):
+    """Find accepted submissions most similar to this one (same problem and language)"""
     try:
-        # Get all coders
-        users = await sb_admin.get(
-            "profiles", 
-            {"role": "eq.coder", "select": "id,username,display_name,created_at"}
+        submissions = await sb_admin.get(
+            "submissions",
+            {"id": f"eq.{submission_id}", **select("id", "user_id", "problem_id", "language_slug", "code", "code_hash", "minhash")}
         )
-        
-        # Get progress for each user
-        for user in users:
-            progress = await sb_admin.get(
-                "user_progress",
-                {"user_id": f"eq.{user['id']}", "select": "*"}
-            )
-            user["problems_solved"] = len([p for p in progress if p.get("solved")])
-            user["total_attempts"] = sum(p.get("attempts", 0) for p in progress)
-        
-        return {"users": users}
+        if not submissions:
+            raise HTTPException(404, detail="Submission not found")
+
+        similar = await similarity_index.similar(submissions[0], max(1, min(k, 100)), include_same_user)
+        return {"submission_id": submission_id, "similar": similar}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.put("/users/{user_id}/role")
+async def update_user_role(user_id: str, update: RoleUpdate, admin=Depends(require_admin)):
+    """Change a user's role (admin or coder)"""
+    if update.role not in ("admin", "coder"):
+        raise HTTPException(400, detail="Role must be 'admin' or 'coder'")
+    try:
+        updated = await sb_admin.patch("profiles", {"id": f"eq.{user_id}"}, {"role": update.role})
+        if not updated:
+            raise HTTPException(404, detail="User not found")
+
+        # Cached role checks must see the change right away
+        await invalidate_profile(user_id)
+        return {"profile": updated[0], "message": "Role updated successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, detail=str(e))
 
@@ -88,6 +229,7 @@ async def create_problem(problem: ProblemCreate, admin=Depends(require_admin)):
         }
         
         created = await sb_admin.post("problems", problem_data)
+        catalog.invalidate_problems()
         return {"problem": created, "message": "Problem created successfully"}
     except Exception as e:
         raise HTTPException(500, detail=str(e))
@@ -106,6 +248,7 @@ async def update_problem(problem_id: str, problem: ProblemCreate, admin=Depends(
         }
         
         updated = await sb_admin.patch("problems", {"id": f"eq.{problem_id}"}, updates)
+        catalog.invalidate_problems()
         return {"problem": updated, "message": "Problem updated successfully"}
     except Exception as e:
         raise HTTPException(500, detail=str(e))
@@ -116,6 +259,7 @@ async def delete_problem(problem_id: str, admin=Depends(require_admin)):
     """Delete a problem"""
     try:
         await sb_admin.delete("problems", {"id": f"eq.{problem_id}"})
+        catalog.invalidate_problems()
         return {"message": "Problem deleted successfully"}
     except Exception as e:
         raise HTTPException(500, detail=str(e))
@@ -128,23 +272,167 @@ async def add_testcase(testcase: TestCaseCreate, admin=Depends(require_admin)):
         testcase_data = {
             "id": str(uuid.uuid4()),
             "problem_id": testcase.problem_id,
-            "input": testcase.input,
-            "expected_output": testcase.expected_output,
+            **await testcase_fields("input", testcase.input),
+            **await testcase_fields("expected_output", testcase.expected_output),
             "is_sample": testcase.is_sample,
             "points": testcase.points,
         }
         
         created = await sb_admin.post("testcases", testcase_data)
+
+        # Re-validate earlier accepted submissions against the new case
+        if settings.REJUDGE_ON_TESTCASE_ADD:
+            await rejudger.enqueue(testcase.problem_id, [testcase_data["id"]])
+
         return {"testcase": created, "message": "Test case added successfully"}
     except Exception as e:
         raise HTTPException(500, detail=str(e))
 
 
+@router.post("/problems/{problem_id}/testcases/bulk")
+async def bulk_import_testcases(
+    problem_id: str,
+    request: Request,
+    batch_size: int = settings.TESTCASE_IMPORT_BATCH_SIZE,
+    admin=Depends(require_admin),
+):
+    """
+    Bulk import test cases from a streamed upload
+    Accepts NDJSON (one testcase object per line) or a zip of *.in/*.out pairs.
+    Valid cases are inserted in batches; invalid ones are reported per item.
+    Bodies over TESTCASE_IMPORT_MAX_BYTES are rejected with 413, and zip
+    members over TESTCASE_IMPORT_MAX_MEMBER_BYTES are reported per item.
+    """
+    if not 1 <= batch_size <= settings.TESTCASE_IMPORT_MAX_BATCH_SIZE:
+        raise HTTPException(400, detail=f"batch_size must be between 1 and {settings.TESTCASE_IMPORT_MAX_BATCH_SIZE}")
+
+    too_large = f"Upload exceeds {settings.TESTCASE_IMPORT_MAX_BYTES} bytes"
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.TESTCASE_IMPORT_MAX_BYTES:
+        raise HTTPException(413, detail=too_large)
+    body = limit_size(request.stream(), settings.TESTCASE_IMPORT_MAX_BYTES)
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    is_zip = content_type in ("application/zip", "application/x-zip-compressed")
+
+    imported_ids = []
+    errors = []
+    batch = []
+
+    async def flush():
+        rows = [row for _, row in batch]
+        try:
+            await sb_admin.post("testcases", rows)
+            imported_ids.extend(row["id"] for row in rows)
+        except Exception as e:
+            errors.extend({"item": label, "error": f"Insert failed: {e}"} for label, _ in batch)
+        batch.clear()
+
+    try:
+        if is_zip:
+            spool = await spool_upload(body, settings.TESTCASE_IMPORT_SPOOL_BYTES)
+            entries = aiter_zip(spool, settings.TESTCASE_IMPORT_MAX_MEMBER_BYTES)
+        else:
+            spool = None
+            entries = iter_ndjson(body)
+
+        try:
+            async for label, item, error in entries:
+                if error:
+                    errors.append({"item": label, "error": error})
+                    continue
+
+                batch.append((label, {
+                    "id": str(uuid.uuid4()),
+                    "problem_id": problem_id,
+                    **await testcase_fields("input", item.input),
+                    **await testcase_fields("expected_output", item.expected_output),
+                    "is_sample": item.is_sample,
+                    "points": item.points,
+                }))
+                if len(batch) >= batch_size:
+                    await flush()
+
+            if batch:
+                await flush()
+        finally:
+            if spool:
+                spool.close()
+
+        if imported_ids and settings.REJUDGE_ON_TESTCASE_ADD:
+            await rejudger.enqueue(problem_id, imported_ids)
+
+        return {
+            "imported": len(imported_ids),
+            "failed": len(errors),
+            "errors": errors,
+            "message": f"Imported {len(imported_ids)} test cases"
+        }
+    except UploadTooLarge:
+        # NDJSON batches before the limit are already stored
+        if imported_ids and settings.REJUDGE_ON_TESTCASE_ADD:
+            await rejudger.enqueue(problem_id, imported_ids)
+        raise HTTPException(413, detail=f"{too_large}; imported {len(imported_ids)} test cases before the limit")
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.post("/problems/{problem_id}/rejudge")
+async def rejudge_problem(problem_id: str, request: RejudgeRequest, admin=Depends(require_admin)):
+    """Queue a background rejudge of accepted submissions against these test cases"""
+    if not request.testcase_ids:
+        raise HTTPException(400, detail="testcase_ids must not be empty")
+    try:
+        job = await rejudger.enqueue(problem_id, request.testcase_ids)
+        return {"job": job, "message": "Rejudge queued"}
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.get("/rejudge")
+async def list_rejudge_jobs(admin=Depends(require_admin)):
+    """List background rejudge jobs and their progress"""
+    try:
+        return {"jobs": await rejudger.list_jobs()}
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+
+@router.post("/judge/batch")
+async def batch_judge(request: BatchJudgeRequest, admin=Depends(require_admin)):
+    """
+    Judge many submissions at once (contest replays, offline grading)
+    Streams one NDJSON line per entry as it finishes, then a final
+    {"done": true, ...} summary line.
+    """
+    if not request.entries:
+        raise HTTPException(400, detail="entries must not be empty")
+    if len(request.entries) > settings.BATCH_JUDGE_MAX_ENTRIES:
+        raise HTTPException(400, detail=f"At most {settings.BATCH_JUDGE_MAX_ENTRIES} entries per batch")
+
+    entries = [entry.model_dump() for entry in request.entries]
+
+    # Judging and writes run in the background; the stream only reports
+    # progress, so a dropped connection doesn't stop the batch midway
+    results = start_batch(entries, request.update_progress, request.include_results)
+
+    async def lines():
+        while (line := await results.get()) is not None:
+            yield dumps(line) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/problems/{problem_id}/testcases")
 async def get_problem_testcases(problem_id: str, admin=Depends(require_admin)):
     """Get all test cases for a problem (including hidden ones)"""
     try:
         testcases = await sb_admin.get("testcases", {"problem_id": f"eq.{problem_id}"})
-        return {"testcases": testcases}
+        # Large inputs/outputs are blob references; resolve them to text
+        for tc in testcases:
+            for field in ("input", "expected_output"):
+                if tc.get(f"{field}_hash"):
+                    tc[field] = await testcase_text(tc, field)
+        return FastJSONResponse({"testcases": testcases})
     except Exception as e:
         raise HTTPException(500, detail=str(e))
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Header
 from app.routes.deps import get_current_user
 from app.services.supabase import SupabaseClient
 from app.services.auth import get_user_from_token
+from app.services.profiles import get_profile, cache_profile
 from datetime import datetime, timezone
 import uuid
 
@@ -29,10 +30,10 @@ async def get_my_profile(authorization: str = Header(...)):
         
         print(f"🔍 Fetching profile for: {user_email} (ID: {user_id})")
         
-        # Check if profile exists in database
-        profiles = await sb_admin.get("profiles", {"id": f"eq.{user_id}"})
+        # Check if profile exists in database (cached)
+        profile = await get_profile(user_id)
         
-        if not profiles or len(profiles) == 0:
+        if not profile:
             print(f"📝 Profile not found for {user_email}, creating new profile...")
             
             # Extract username from email (part before @)
@@ -53,6 +54,7 @@ async def get_my_profile(authorization: str = Header(...)):
             }
             
             await sb_admin.post("profiles", new_profile)
+            await cache_profile(new_profile)
             print(f"✅ Profile created: {username} ({role})")
             
             # Return profile with email
@@ -60,7 +62,6 @@ async def get_my_profile(authorization: str = Header(...)):
             return new_profile
         
         # Profile exists, return it with email from auth
-        profile = profiles[0]
         profile["email"] = user_email
         
         print(f"✅ Profile found: {profile['username']} ({profile.get('role', 'coder')})")
@@ -1,8 +1,6 @@
 from fastapi import Header, HTTPException
 from app.services.auth import get_user_from_token
-from app.services.supabase import SupabaseClient
-
-sb_admin = SupabaseClient(admin=True)
+from app.services.profiles import get_profile
 
 async def get_current_user(authorization: str = Header(...)):
     """Get current user ID from token"""
@@ -23,14 +21,12 @@ async def require_admin(authorization: str = Header(...)):
     user = await get_user_from_token(token)
     user_id = user["id"]
     
-    # Get user profile to check role
-    profiles = await sb_admin.get("profiles", {"id": f"eq.{user_id}"})
+    # Get user profile to check role (cached)
+    profile = await get_profile(user_id)
     
-    if not profiles or len(profiles) == 0:
+    if not profile:
         raise HTTPException(403, "Profile not found")
     
-    profile = profiles[0]
-    
     if profile.get("role") != "admin":
         raise HTTPException(403, "Admin access required")
     
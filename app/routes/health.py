@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.warmup import warmup
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 503 until startup warm-up has finished"""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if warmup.ready else 503)
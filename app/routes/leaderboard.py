@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException
+from app.services.supabase import SupabaseClient
+from app.services.leaderboard import leaderboard
+
+router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
+sb_admin = SupabaseClient(admin=True)
+
+
+@router.get("/")
+async def get_leaderboard(limit: int = 50, offset: int = 0):
+    """Get a page of the global ranking with profile info"""
+    try:
+        await leaderboard.ensure_loaded()
+        limit = max(1, min(limit, 200))
+        entries = leaderboard.top(limit, max(offset, 0))
+
+        if entries:
+            ids = ",".join(e["user_id"] for e in entries)
+            profiles = await sb_admin.get(
+                "profiles",
+                {"id": f"in.({ids})", "select": "id,username,display_name,avatar_url"}
+            )
+            profile_map = {p["id"]: p for p in profiles}
+            for entry in entries:
+                profile = profile_map.get(entry["user_id"], {})
+                entry["username"] = profile.get("username")
+                entry["display_name"] = profile.get("display_name")
+                entry["avatar_url"] = profile.get("avatar_url")
+
+        return {"total_users": leaderboard.user_count(), "entries": entries}
+    except Exception as e:
+        print(f"Error fetching leaderboard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/users/{user_id}")
+async def get_user_rank(user_id: str):
+    """Get a single user's rank and totals"""
+    try:
+        await leaderboard.ensure_loaded()
+    except Exception as e:
+        print(f"Error fetching leaderboard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    entry = leaderboard.rank(user_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="User has no submissions")
+    return entry
+
+
+@router.get("/problems/{problem_id}")
+async def get_problem_stats(problem_id: str):
+    """Get acceptance rate and attempt counts for a problem"""
+    try:
+        await leaderboard.ensure_loaded()
+        return leaderboard.problem_stats(problem_id)
+    except Exception as e:
+        print(f"Error fetching problem stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.services.supabase import SupabaseClient
+from app.services.responses import FastJSONResponse
+from app.services.catalog import catalog
 
 router = APIRouter(prefix="/problems", tags=["Problems"])
 sb_admin = SupabaseClient(admin=True)
@@ -11,14 +13,11 @@ async def list_problems(user_id: str = None):
     If user_id is provided, include solved status
     """
     try:
-        # Get all problems
-        problems = await sb_admin.get(
-            "problems",
-            {"select": "id,title,slug,difficulty,tags"}
-        )
+        # Get all problems (cached)
+        problems = await catalog.problems()
         
         if not user_id:
-            return {"problems": problems}
+            return FastJSONResponse({"problems": problems})
         
         # Get user progress for this user
         progress = await sb_admin.get(
@@ -41,7 +40,7 @@ async def list_problems(user_id: str = None):
                 problem["best_score"] = 0
                 problem["attempts"] = 0
         
-        return {"problems": problems}
+        return FastJSONResponse({"problems": problems})
         
     except Exception as e:
         print(f"Error fetching problems: {e}")
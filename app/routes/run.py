@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from app.services.supabase import SupabaseClient
-from app.services.piston import run_code
+from app.services.piston import run_code, execution_limits
 from app.services.evaluator import is_correct
-from app.schemas import ExecutePayload
+from app.services.blobs import testcase_text
+from app.services.judge import executor_slots
+from app.services.catalog import catalog
+from app.schemas import ExecutePayload, Verdict
 
 router = APIRouter(prefix="/run", tags=["Run"])
 sb_admin = SupabaseClient(admin=True)
@@ -15,11 +18,11 @@ async def run_sample(problem_id: str, payload: ExecutePayload):
     """
     try:
         # 1. Validate Language
-        langs = await sb_admin.get("languages", {"slug": f"eq.{payload.language}"})
-        if not langs:
+        lang_config = await catalog.language(payload.language)
+        if not lang_config:
             raise HTTPException(status_code=400, detail="Invalid language selected")
         
-        executor_lang = langs[0]["executor_key"]
+        executor_lang = lang_config["executor_key"]
 
         # 2. Get ONLY Sample Testcases (is_sample = true)
         testcases = await sb_admin.get(
@@ -30,19 +33,29 @@ async def run_sample(problem_id: str, payload: ExecutePayload):
         if not testcases:
             raise HTTPException(status_code=404, detail="No sample test cases found")
 
+        problems = await sb_admin.get("problems", {"id": f"eq.{problem_id}", "select": "*"})
+        limits = execution_limits(problems[0] if problems else None, lang_config)
+
         # 3. Run against the first sample testcase
         tc = testcases[0]
-        output = await run_code(executor_lang, payload.code, tc["input"])
+        tc_input = await testcase_text(tc, "input")
+        expected = await testcase_text(tc, "expected_output")
+        async with executor_slots.slot():
+            result = await run_code(executor_lang, payload.code, tc_input, limits=limits)
         
-        # Check if it's an error
-        is_error = output.startswith("Error:") or output.startswith("Compilation Error:") or output.startswith("Runtime Error:")
+        if result.verdict == Verdict.AC and not is_correct(expected, result.stdout):
+            result.verdict = Verdict.WA
         
         return {
-            "input": tc["input"],
-            "expected": tc["expected_output"],
-            "output": output,
-            "passed": is_correct(tc["expected_output"], output) if not is_error else False,
-            "is_error": is_error
+            "input": tc_input,
+            "expected": expected,
+            "output": result.display(),
+            "passed": result.verdict == Verdict.AC,
+            "verdict": result.verdict.value,
+            "is_error": result.is_error,
+            "cpu_ms": result.cpu_ms,
+            "wall_ms": result.wall_ms,
+            "memory_kb": result.memory_kb
         }
     except HTTPException:
         raise
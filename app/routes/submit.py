@@ -1,11 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.routes.deps import get_current_user
 from app.services.supabase import SupabaseClient
-from app.services.piston import run_code
-from app.services.evaluator import is_correct
+from app.services.judge import judge
+from app.services.piston import execution_limits
+from app.services.testcase_stats import testcase_stats
+from app.services.leaderboard import leaderboard
+from app.services.similarity import similarity_index
+from app.services.percentiles import percentiles
+from app.services.content_store import stored_fields
+from app.services.responses import FastJSONResponse
+from app.services.catalog import catalog
+from app.services import metrics
+from app.config import settings
 from app.schemas import ExecutePayload
 from datetime import datetime, timezone
-import time
 import uuid
 from typing import List, Dict
 import traceback
@@ -28,11 +36,10 @@ async def submit(problem_id: str, payload: ExecutePayload, user_id=Depends(get_c
         print(f"{'='*60}\n")
         
         # 1. Validate Language
-        langs = await sb_admin.get("languages", {"slug": f"eq.{payload.language}"})
-        if not langs:
+        lang_config = await catalog.language(payload.language)
+        if not lang_config:
             raise HTTPException(status_code=400, detail="Invalid language selected")
         
-        lang_config = langs[0]
         executor_lang = lang_config["executor_key"]
         print(f"✓ Language validated: {executor_lang}")
 
@@ -47,48 +54,38 @@ async def submit(problem_id: str, payload: ExecutePayload, user_id=Depends(get_c
         
         print(f"✓ Found {len(testcases)} test cases")
 
-        # 3. Execute code against each testcase
-        submission_results: List[Dict] = []
-        passed_count = 0
-        total_score = 0
-        all_passed = True
-        main_output = ""
-        
-        for idx, tc in enumerate(testcases):
-            print(f"\nRunning test case {idx + 1}/{len(testcases)}...")
-            start_time = time.time()
-            
-            output = await run_code(executor_lang, payload.code, tc["input"])
-            duration_ms = int((time.time() - start_time) * 1000)
+        problems = await sb_admin.get("problems", {"id": f"eq.{problem_id}", "select": "*"})
+        problem = problems[0] if problems else {}
 
-            is_error = output.startswith("Error:") or output.startswith("Compilation Error:") or output.startswith("Runtime Error:")
-            
-            if is_error:
-                passed = False
-                all_passed = False
-                if not main_output:
-                    main_output = output
-                print(f"  ✗ Failed (error)")
-            else:
-                passed = is_correct(tc["expected_output"], output)
-                if passed:
-                    passed_count += 1
-                    total_score += tc.get("points", 0)
-                    if not main_output:
-                        main_output = output
-                    print(f"  ✓ Passed ({duration_ms}ms)")
-                else:
-                    all_passed = False
-                    if not main_output:
-                        main_output = output
-                    print(f"  ✗ Wrong answer ({duration_ms}ms)")
-
-            submission_results.append({
-                "testcase_id": str(tc["id"]),
-                "passed": passed,
-                "actual_output": output[:1000],
-                "runtime_ms": duration_ms
-            })
+        fail_fast = payload.fail_fast
+        if fail_fast is None:
+            fail_fast = problem.get("fail_fast")
+        if fail_fast is None:
+            fail_fast = settings.JUDGE_FAIL_FAST
+
+        # 3. Execute code against each testcase, most-failed first
+        ordered = await testcase_stats.order(problem_id, testcases)
+        print(f"\nRunning {len(ordered)} test cases{' (fail-fast)' if fail_fast else ''}...")
+        limits = execution_limits(problem, lang_config)
+        judged = await judge(executor_lang, payload.code, ordered, fail_fast=fail_fast, limits=limits)
+        await testcase_stats.record(problem_id, judged["results"])
+
+        passed_count = judged["passed_count"]
+        total_score = judged["total_score"]
+        all_passed = judged["all_passed"]
+        main_output = judged["main_output"]
+
+        submission_results: List[Dict] = [
+            {
+                "testcase_id": res["testcase_id"],
+                "passed": res["passed"],
+                "verdict": res["verdict"],
+                "actual_output": res["output"][:1000],
+                "runtime_ms": res["runtime_ms"],
+                "memory_kb": res["memory_kb"]
+            }
+            for res in judged["results"]
+        ]
 
         print(f"\n{'='*60}")
         print(f"EXECUTION COMPLETE: {passed_count}/{len(testcases)} passed")
@@ -104,9 +101,13 @@ async def submit(problem_id: str, payload: ExecutePayload, user_id=Depends(get_c
             "user_id": str(user_id),
             "problem_id": str(problem_id),
             "language_slug": payload.language,
-            "code": payload.code,
+            # Source is stored once, compressed, and referenced by hash
+            **(await stored_fields("code", [payload.code]))[0],
             "passed": all_passed,
+            "verdict": judged["verdict"],
             "score": total_score,
+            "runtime_ms": judged["runtime_ms"],
+            "memory_kb": judged["memory_kb"],
             "output": main_output[:500] if main_output else "",
             "created_at": current_time,
         }
@@ -130,14 +131,17 @@ async def submit(problem_id: str, payload: ExecutePayload, user_id=Depends(get_c
         if submission_results:
             print(f"Inserting {len(submission_results)} test results...")
             results_to_insert = []
-            for res in submission_results:
+            output_fields = await stored_fields("actual_output", [res["actual_output"] for res in submission_results])
+            for res, output_field in zip(submission_results, output_fields):
                 results_to_insert.append({
                     "id": str(uuid.uuid4()),
                     "submission_id": submission_id,
                     "testcase_id": res["testcase_id"],
                     "passed": res["passed"],
-                    "actual_output": res["actual_output"],
+                    "verdict": res["verdict"],
+                    **output_field,
                     "runtime_ms": res["runtime_ms"],
+                    "memory_kb": res["memory_kb"],
                     "created_at": datetime.now(timezone.utc).isoformat(),
                 })
             
@@ -186,19 +190,35 @@ async def submit(problem_id: str, payload: ExecutePayload, user_id=Depends(get_c
         except Exception as e:
             print(f"Warning: Progress update failed: {e}")
 
+        leaderboard.record_submission(user_id, problem_id, all_passed, total_score)
+        ranks = {"runtime_beats": None, "memory_beats": None}
+        if all_passed:
+            await similarity_index.add(problem_id, payload.language, submission_id, user_id, payload.code)
+            ranks = await percentiles.rank_and_record(
+                problem_id, payload.language, submission_id, judged["runtime_ms"], judged["memory_kb"]
+            )
+        await metrics.incr("submissions")
+        if all_passed:
+            await metrics.incr("submissions_accepted")
+
         print(f"\n{'='*60}")
         print(f"SUBMISSION SUCCESSFUL")
         print(f"{'='*60}\n")
 
-        # 7. Return results
-        return {
+        # 7. Return results (every actual_output included, so skip re-encoding)
+        return FastJSONResponse({
             "passed": all_passed,
+            "verdict": judged["verdict"],
             "score": total_score,
             "submission_id": submission_id,
             "total_tests": len(testcases),
             "passed_tests": passed_count,
+            "skipped_tests": judged["skipped"],
+            "runtime_ms": judged["runtime_ms"],
+            "memory_kb": judged["memory_kb"],
+            **ranks,
             "results": submission_results
-        }
+        })
         
     except HTTPException:
         raise
@@ -1,10 +1,55 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+from enum import Enum
 
 class ExecutePayload(BaseModel):
     language: str
     code: str
+    # Stop at the first failing testcase (defaults to the problem's setting)
+    fail_fast: Optional[bool] = None
+
+class Verdict(str, Enum):
+    AC = "AC"    # Accepted (from the executor: ran cleanly, output not yet checked)
+    WA = "WA"    # Wrong answer
+    TLE = "TLE"  # Time limit exceeded
+    MLE = "MLE"  # Memory limit exceeded
+    RE = "RE"    # Runtime error
+    CE = "CE"    # Compilation error
+    OLE = "OLE"  # Output limit exceeded
+    IE = "IE"    # Internal error (executor unreachable, bad response, ...)
+
+class ExecutionLimits(BaseModel):
+    time_ms: int
+    memory_kb: Optional[int] = None  # None: no memory cap
+
+class ExecutionResult(BaseModel):
+    verdict: Verdict
+    stdout: str = ""
+    stderr: str = ""
+    cpu_ms: Optional[int] = None
+    wall_ms: Optional[int] = None
+    memory_kb: Optional[int] = None
+
+    @property
+    def is_error(self) -> bool:
+        return self.verdict not in (Verdict.AC, Verdict.WA)
+
+    def display(self) -> str:
+        """Human-readable output, as shown to users"""
+        if self.verdict == Verdict.CE:
+            return f"Compilation Error:\n{self.stderr or self.stdout or 'Compilation failed'}"
+        if self.verdict == Verdict.RE:
+            return f"Runtime Error:\n{self.stderr or self.stdout}"
+        if self.verdict == Verdict.TLE:
+            return "Time Limit Exceeded"
+        if self.verdict == Verdict.MLE:
+            return "Memory Limit Exceeded"
+        if self.verdict == Verdict.OLE:
+            return "Output Limit Exceeded"
+        if self.verdict == Verdict.IE:
+            return f"Error: {self.stderr}"
+        return self.stdout.strip() or self.stderr.strip()
 
 class TestCase(BaseModel):
     id: str
@@ -16,8 +61,10 @@ class TestCase(BaseModel):
 class SubmissionResult(BaseModel):
     testcase_id: str
     passed: bool
+    verdict: Verdict
     actual_output: str
     runtime_ms: int
+    memory_kb: Optional[int] = None
 
 class SubmissionResponse(BaseModel):
     passed: bool
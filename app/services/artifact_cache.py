@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+from typing import Dict, Optional
+
+from app.config import settings
+from app.schemas import ExecutionLimits, ExecutionResult
+from app.services import metrics
+from app.services.disk_cache import atomic_write, cache_entries, evict_lru
+
+# Languages with a compile step worth skipping
+COMPILED_LANGUAGES = {"c", "cpp", "java", "rust", "go"}
+
+
+class ArtifactCache:
+    """
+    On-disk LRU cache of compile/run outcomes for compiled languages
+    Keyed by (language, compiler version Piston reports, source hash), plus
+    stdin and limits for runs. A hit skips the executor call; evicted
+    entries are just misses (see disk_cache.evict_lru).
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.versions: Dict[str, str] = {}
+        self._written_since_sweep = 0
+
+    def _key(self, kind: str, language: str, code: str, stdin: Optional[str] = None, limits: Optional[ExecutionLimits] = None) -> Optional[str]:
+        version = self.versions.get(language)
+        if language not in COMPILED_LANGUAGES or not version:
+            return None
+        limit_key = f"{limits.time_ms}:{limits.memory_kb}" if limits else ""
+        h = hashlib.sha256()
+        for part in (kind, language, version, code, stdin or "", limit_key):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return os.path.join(self.root, f"{h.hexdigest()}.{kind}")
+
+    def learn_version(self, language: str, version: Optional[str]):
+        if version:
+            self.versions[language] = version
+
+    async def get(self, language: str, code: str, stdin: str, limits: ExecutionLimits) -> Optional[ExecutionResult]:
+        """Get a cached outcome (compile error first, then run result)"""
+        for path in (self._key("compile", language, code), self._key("run", language, code, stdin, limits)):
+            if path is None:
+                continue
+            cached = await asyncio.to_thread(self._read, path)
+            if cached is None:
+                continue
+            try:
+                result = ExecutionResult.model_validate_json(cached)
+            except ValueError:
+                # Unreadable or from an older format; treat as a miss
+                continue
+            await metrics.incr("artifact_cache_hits")
+            return result
+
+        if language in COMPILED_LANGUAGES:
+            await metrics.incr("artifact_cache_misses")
+        return None
+
+    async def put_compile_error(self, language: str, code: str, result: ExecutionResult):
+        await self._put(self._key("compile", language, code), result.model_dump_json())
+
+    async def put_run(self, language: str, code: str, stdin: str, limits: ExecutionLimits, result: ExecutionResult):
+        await self._put(self._key("run", language, code, stdin, limits), result.model_dump_json())
+
+    async def _put(self, path: Optional[str], output: str):
+        if path is None:
+            return
+        try:
+            size = await asyncio.to_thread(self._write, path, output)
+            self._written_since_sweep += size
+            if self._written_since_sweep > self.max_bytes // 10:
+                self._written_since_sweep = 0
+                evicted = await asyncio.to_thread(evict_lru, self.root, self.max_bytes)
+                if evicted:
+                    print(f"Artifact cache: evicted {evicted} entries")
+        except OSError as e:
+            print(f"Warning: Artifact cache write failed: {e}")
+
+    @staticmethod
+    def _read(path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                os.utime(f.fileno())  # mark as recently used
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, output: str) -> int:
+        return atomic_write(path, lambda f: f.write(output.encode("utf-8")))
+
+    async def stats(self) -> dict:
+        counters = await metrics.snapshot()
+        hits = counters.get("artifact_cache_hits", 0)
+        misses = counters.get("artifact_cache_misses", 0)
+
+        def usage():
+            entries = cache_entries(self.root)
+            return len(entries), sum(size for _, size, _ in entries)
+
+        entries, size_bytes = await asyncio.to_thread(usage)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+artifact_cache = ArtifactCache(settings.ARTIFACT_CACHE_DIR, settings.ARTIFACT_CACHE_MAX_BYTES)
@@ -1,6 +1,7 @@
-import httpx
 from fastapi import HTTPException
 from app.config import settings
+from app.services.profiler import span
+from app.services.http_clients import http_client
 
 async def get_user_from_token(token: str) -> dict:
     headers = {
@@ -8,7 +9,8 @@ async def get_user_from_token(token: str) -> dict:
         "apikey": settings.SUPABASE_ANON_KEY,
     }
 
-    async with httpx.AsyncClient() as client:
+    client = http_client("supabase-auth", timeout=5.0)
+    with span("auth.user"):
         res = await client.get(
             f"{settings.SUPABASE_URL}/auth/v1/user",
             headers=headers,
@@ -0,0 +1,329 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Set, Tuple
+
+from app.config import settings
+from app.services.supabase import SupabaseClient
+from app.services.judge import judge, wait_for_free_slot
+from app.services.piston import execution_limits
+from app.services.testcase_stats import testcase_stats
+from app.services.leaderboard import leaderboard
+from app.services.similarity import minhash, similarity_index
+from app.services.percentiles import percentiles
+from app.services.content_store import stored_fields
+from app.services.catalog import catalog
+from app.services import metrics
+
+sb_admin = SupabaseClient(admin=True)
+
+
+async def _load_problems(problem_ids: List[str]) -> Tuple[Dict[str, dict], Dict[str, List[dict]]]:
+    """Fetch problems and their testcases (most-failed first), once per problem"""
+    ids = ",".join(problem_ids)
+    problems = {
+        str(problem["id"]): problem
+        for problem in await sb_admin.get("problems", {"id": f"in.({ids})", "select": "*"})
+    }
+
+    testcases: Dict[str, List[dict]] = {}
+    async for tc in sb_admin.iter_rows("testcases", {"problem_id": f"in.({ids})", "select": "*"}):
+        testcases.setdefault(str(tc["problem_id"]), []).append(tc)
+
+    for problem_id, cases in testcases.items():
+        testcases[problem_id] = await testcase_stats.order(problem_id, cases)
+    return problems, testcases
+
+
+def _fail_fast(problem: dict) -> bool:
+    if problem.get("fail_fast") is not None:
+        return problem["fail_fast"]
+    return settings.JUDGE_FAIL_FAST
+
+
+async def _write(judged_entries: List[dict]):
+    """Bulk-insert submissions and their testcase results"""
+    code_fields = await stored_fields("code", [item["entry"]["code"] for item in judged_entries])
+    outputs = [
+        res["output"][:1000]
+        for item in judged_entries
+        for res in item["judged"]["results"]
+    ]
+    output_fields = iter(await stored_fields("actual_output", outputs))
+
+    now = datetime.now(timezone.utc).isoformat()
+    submissions = []
+    results = []
+    for item, code_field in zip(judged_entries, code_fields):
+        entry, judged = item["entry"], item["judged"]
+        submissions.append({
+            "id": item["submission_id"],
+            "user_id": str(entry["user_id"]),
+            "problem_id": str(entry["problem_id"]),
+            "language_slug": entry["language"],
+            **code_field,
+            "passed": judged["all_passed"],
+            "verdict": judged["verdict"],
+            "score": judged["total_score"],
+            "runtime_ms": judged["runtime_ms"],
+            "memory_kb": judged["memory_kb"],
+            "output": judged["main_output"][:500] if judged["main_output"] else "",
+            "minhash": item["minhash"],
+            "created_at": now,
+        })
+        for res in judged["results"]:
+            results.append({
+                "id": str(uuid.uuid4()),
+                "submission_id": item["submission_id"],
+                "testcase_id": res["testcase_id"],
+                "passed": res["passed"],
+                "verdict": res["verdict"],
+                **next(output_fields),
+                "runtime_ms": res["runtime_ms"],
+                "memory_kb": res["memory_kb"],
+                "created_at": now,
+            })
+
+    await sb_admin.post("submissions", submissions)
+    if results:
+        await sb_admin.post("submission_results", results)
+
+
+async def _update_progress(progress: Dict[Tuple[str, str], dict]):
+    """Apply per-(user, problem) attempt counts and best scores in bulk"""
+    by_problem: Dict[str, List[str]] = {}
+    for user_id, problem_id in progress:
+        by_problem.setdefault(problem_id, []).append(user_id)
+
+    now = datetime.now(timezone.utc).isoformat()
+    new_rows = []
+    for problem_id, user_ids in by_problem.items():
+        existing = {
+            str(row["user_id"]): row
+            for row in await sb_admin.get(
+                "user_progress",
+                {"problem_id": f"eq.{problem_id}", "user_id": f"in.({','.join(user_ids)})"},
+            )
+        }
+        for user_id in user_ids:
+            batch = progress[(user_id, problem_id)]
+            curr = existing.get(user_id)
+            if curr is None:
+                new_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "problem_id": problem_id,
+                    "solved": batch["solved"],
+                    "best_score": batch["best_score"],
+                    "attempts": batch["attempts"],
+                    "last_submission_at": now,
+                    "created_at": now,
+                })
+                continue
+
+            updates = {
+                "attempts": curr.get("attempts", 0) + batch["attempts"],
+                "last_submission_at": now,
+            }
+            if batch["solved"] and not curr.get("solved", False):
+                updates["solved"] = True
+            if batch["best_score"] > curr.get("best_score", 0):
+                updates["best_score"] = batch["best_score"]
+            await sb_admin.patch("user_progress", {"id": f"eq.{curr['id']}"}, updates)
+
+    if new_rows:
+        await sb_admin.post("user_progress", new_rows)
+
+
+def batch_concurrency() -> int:
+    """Entries judged at once; at least one executor slot is always left for live traffic"""
+    return max(1, min(settings.BATCH_JUDGE_CONCURRENCY, settings.EXECUTOR_CONCURRENCY - 1))
+
+
+# Running batches, referenced so they aren't garbage collected mid-run
+_running: Set[asyncio.Task] = set()
+
+
+def start_batch(entries: List[dict], update_progress: bool = True, include_results: bool = False) -> asyncio.Queue:
+    """
+    Judge a batch in the background and return a queue of its result lines
+    The batch runs to completion (including every write) even if nobody
+    reads the queue, e.g. after the client disconnects. The last item
+    is None.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        try:
+            await judge_batch(entries, queue.put_nowait, update_progress, include_results)
+        except Exception as e:
+            print(f"Batch judge failed: {e}")
+            queue.put_nowait({"done": False, "error": str(e)})
+        finally:
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return queue
+
+
+async def judge_batch(
+    entries: List[dict],
+    emit: Callable[[dict], None],
+    update_progress: bool = True,
+    include_results: bool = False,
+):
+    """
+    Judge many (user_id, problem_id, language, code) entries
+    Problems and testcases are fetched once for the whole batch.
+    Entries run concurrently, one testcase at a time each. At most
+    BATCH_JUDGE_CONCURRENCY run at once, and always fewer than the
+    executor slots; each run also waits for a free slot, so live requests
+    don't queue behind the batch. A result line is emitted for each entry
+    as soon as it finishes; an entry that fails to judge gets an error line.
+
+    Submissions and testcase results are inserted every
+    BATCH_JUDGE_WRITE_SIZE entries, and with update_progress each write is
+    followed by its user_progress update, so an interrupted batch never
+    leaves stored submissions uncounted. The leaderboard is reconciled
+    once at the end.
+    """
+    languages = await catalog.languages()
+    problems, testcases = await _load_problems(sorted({str(entry["problem_id"]) for entry in entries}))
+    print(f"Batch judge: {len(entries)} entries across {len(problems)} problems")
+
+    in_flight = asyncio.Semaphore(batch_concurrency())
+
+    async def run_entry(idx: int, entry: dict) -> dict:
+        problem_id = str(entry["problem_id"])
+        lang_config = languages.get(entry["language"])
+        if not lang_config:
+            return {"index": idx, "entry": entry, "error": "Invalid language"}
+        if not testcases.get(problem_id):
+            return {"index": idx, "entry": entry, "error": "No test cases found"}
+
+        problem = problems.get(problem_id, {})
+        try:
+            async with in_flight:
+                judged = await judge(
+                    lang_config["executor_key"],
+                    entry["code"],
+                    testcases[problem_id],
+                    fail_fast=_fail_fast(problem),
+                    limits=execution_limits(problem, lang_config),
+                    concurrency=1,
+                    before_run=wait_for_free_slot,
+                )
+            signature = await asyncio.to_thread(minhash, entry["code"]) if judged["all_passed"] else None
+        except Exception as e:
+            print(f"Warning: Batch entry {idx} failed: {e}")
+            return {"index": idx, "entry": entry, "error": f"Judging failed: {e}"}
+        return {
+            "index": idx,
+            "entry": entry,
+            "judged": judged,
+            "submission_id": str(uuid.uuid4()),
+            "minhash": list(signature) if signature else None,
+        }
+
+    tasks = [asyncio.create_task(run_entry(idx, entry)) for idx, entry in enumerate(entries)]
+    pending_writes: List[dict] = []
+    judged_count = accepted_count = stored_count = failed_writes = 0
+
+    async def flush():
+        nonlocal stored_count, failed_writes
+        batch = pending_writes[:]
+        pending_writes.clear()
+        try:
+            await _write(batch)
+        except Exception as e:
+            print(f"Warning: Batch judge write failed: {e}")
+            failed_writes += len(batch)
+            emit({"write_error": str(e), "indexes": [item["index"] for item in batch]})
+            return
+        stored_count += len(batch)
+
+        # Only stored submissions count towards progress and the similarity index
+        progress: Dict[Tuple[str, str], dict] = {}
+        for item in batch:
+            entry, judged = item["entry"], item["judged"]
+            user_id, problem_id = str(entry["user_id"]), str(entry["problem_id"])
+            prog = progress.setdefault((user_id, problem_id), {"solved": False, "best_score": 0, "attempts": 0})
+            prog["attempts"] += 1
+            prog["solved"] = prog["solved"] or judged["all_passed"]
+            prog["best_score"] = max(prog["best_score"], judged["total_score"])
+            if item["minhash"]:
+                similarity_index.index(problem_id, entry["language"], item["submission_id"], user_id, tuple(item["minhash"]))
+
+        if update_progress:
+            try:
+                await _update_progress(progress)
+            except Exception as e:
+                print(f"Warning: Batch progress update failed: {e}")
+                emit({"progress_error": str(e), "indexes": [item["index"] for item in batch]})
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            entry = item["entry"]
+            line = {"index": item["index"], "ref": entry.get("ref")}
+
+            if "error" in item:
+                emit({**line, "error": item["error"]})
+                continue
+
+            judged = item["judged"]
+            problem_id = str(entry["problem_id"])
+            judged_count += 1
+            accepted_count += judged["all_passed"]
+            await testcase_stats.record(problem_id, judged["results"])
+
+            ranks = {"runtime_beats": None, "memory_beats": None}
+            if judged["all_passed"]:
+                ranks = await percentiles.rank_and_record(
+                    problem_id, entry["language"], item["submission_id"], judged["runtime_ms"], judged["memory_kb"]
+                )
+
+            pending_writes.append(item)
+            line.update({
+                "submission_id": item["submission_id"],
+                "passed": judged["all_passed"],
+                "verdict": judged["verdict"],
+                "score": judged["total_score"],
+                "total_tests": len(testcases[problem_id]),
+                "passed_tests": judged["passed_count"],
+                "skipped_tests": judged["skipped"],
+                "runtime_ms": judged["runtime_ms"],
+                "memory_kb": judged["memory_kb"],
+                **ranks,
+            })
+            if include_results:
+                line["results"] = [
+                    {key: res[key] for key in ("testcase_id", "passed", "verdict", "runtime_ms", "memory_kb")}
+                    for res in judged["results"]
+                ]
+            emit(line)
+
+            if len(pending_writes) >= settings.BATCH_JUDGE_WRITE_SIZE:
+                await flush()
+    finally:
+        # Whatever was judged is stored, even if the batch stops early
+        if pending_writes:
+            await flush()
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if update_progress and stored_count:
+        try:
+            await leaderboard.reconcile()
+        except Exception as e:
+            print(f"Warning: Leaderboard reconcile failed: {e}")
+
+    await metrics.incr("submissions", judged_count)
+    await metrics.incr("submissions_accepted", accepted_count)
+    print(f"✓ Batch judge complete: {judged_count} judged, {failed_writes} not stored")
+
+    emit({"done": True, "judged": judged_count, "errors": len(entries) - judged_count, "failed_writes": failed_writes})
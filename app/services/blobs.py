@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.config import settings
+from app.services.http_clients import http_client
+from app.services.disk_cache import atomic_write, evict_lru
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _shard(root: str, digest: str) -> str:
+    return os.path.join(root, digest[:2], digest[2:])
+
+
+class LocalBlobBackend:
+    """
+    Stores zlib-compressed blobs on the local filesystem
+    Layout: <root>/<first 2 hex chars>/<rest of sha256>
+    Only for development: instance disks are not durable or shared.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    async def has(self, digest: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, _shard(self.root, digest))
+
+    async def store(self, digest: str, compressed_path: str) -> None:
+        def copy():
+            atomic_write(_shard(self.root, digest), lambda f: _copy_file(compressed_path, f))
+
+        await asyncio.to_thread(copy)
+
+    @asynccontextmanager
+    async def fetch(self, digest: str) -> AsyncIterator[str]:
+        """Yield a local path to the compressed blob"""
+        path = _shard(self.root, digest)
+        if not await asyncio.to_thread(os.path.exists, path):
+            raise KeyError(f"Blob not found: {digest}")
+        yield path
+
+
+class SupabaseStorageBackend:
+    """
+    Stores zlib-compressed blobs in a Supabase Storage bucket
+    Object names use the same sharded layout as the local backend.
+    """
+
+    def __init__(self, bucket: str):
+        self.base_url = f"{settings.SUPABASE_URL}/storage/v1/object"
+        self.bucket = bucket
+        self.headers = {
+            "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+        }
+
+    def _url(self, digest: str, prefix: str = "") -> str:
+        return f"{self.base_url}/{prefix}{self.bucket}/{digest[:2]}/{digest[2:]}"
+
+    async def has(self, digest: str) -> bool:
+        res = await http_client("supabase-storage", timeout=60.0).head(
+            self._url(digest, "authenticated/"), headers=self.headers
+        )
+        return res.status_code == 200
+
+    async def store(self, digest: str, compressed_path: str) -> None:
+        def read() -> bytes:
+            with open(compressed_path, "rb") as f:
+                return f.read()
+
+        # Content-addressed, so overwriting an existing object is harmless
+        res = await http_client("supabase-storage", timeout=60.0).post(
+            self._url(digest),
+            headers={**self.headers, "Content-Type": "application/octet-stream", "x-upsert": "true"},
+            content=await asyncio.to_thread(read),
+        )
+        res.raise_for_status()
+
+    @asynccontextmanager
+    async def fetch(self, digest: str) -> AsyncIterator[str]:
+        """Download the compressed blob to a temp file and yield its path"""
+        fd, tmp_path = tempfile.mkstemp(prefix="blob-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                client = http_client("supabase-storage", timeout=60.0)
+                async with client.stream("GET", self._url(digest, "authenticated/"), headers=self.headers) as res:
+                    if res.status_code in (400, 404):
+                        raise KeyError(f"Blob not found: {digest}")
+                    res.raise_for_status()
+                    async for chunk in res.aiter_bytes(CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+            yield tmp_path
+        finally:
+            os.unlink(tmp_path)
+
+
+def _copy_file(src_path: str, dst) -> None:
+    with open(src_path, "rb") as src:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+class BlobStore:
+    """
+    Content-addressed blob store
+    Blobs are keyed by the sha256 of their uncompressed content and kept
+    compressed in the backend. Reads decompress once into a local disk cache
+    and are served from there as memory maps. The cache is only a cache:
+    least recently used files are evicted past cache_max_bytes, and a
+    wiped cache is refilled from the backend.
+    """
+
+    def __init__(self, backend, cache_dir: str, cache_max_bytes: int):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self._cached_since_sweep = 0
+
+    async def put(self, data: bytes) -> str:
+        """Store data and return its hash (no-op if it already exists)"""
+        digest = blob_hash(data)
+
+        # Keep a decompressed copy so the first read is a cache hit
+        if await self.backend.has(digest):
+            await self._cache_write(digest, lambda f: f.write(data), len(data))
+            return digest
+
+        def compress() -> str:
+            fd, tmp_path = tempfile.mkstemp(prefix="blob-")
+            with os.fdopen(fd, "wb") as f:
+                compressor = zlib.compressobj(6)
+                view = memoryview(data)
+                for offset in range(0, len(view), CHUNK_SIZE):
+                    f.write(compressor.compress(view[offset:offset + CHUNK_SIZE]))
+                f.write(compressor.flush())
+            return tmp_path
+
+        tmp_path = await asyncio.to_thread(compress)
+        try:
+            await self.backend.store(digest, tmp_path)
+        finally:
+            os.unlink(tmp_path)
+
+        await self._cache_write(digest, lambda f: f.write(data), len(data))
+        return digest
+
+    async def _cache_write(self, digest: str, write, size: int):
+        cache_path = _shard(self.cache_dir, digest)
+        if not await asyncio.to_thread(os.path.exists, cache_path):
+            await asyncio.to_thread(atomic_write, cache_path, write)
+            await self._cached(size)
+
+    async def _cached(self, size: int):
+        self._cached_since_sweep += size
+        if self._cached_since_sweep > self.cache_max_bytes // 10:
+            self._cached_since_sweep = 0
+            await asyncio.to_thread(evict_lru, self.cache_dir, self.cache_max_bytes)
+
+    async def _fetch(self, digest: str, cache_path: str):
+        async with self.backend.fetch(digest) as compressed_path:
+            size = await asyncio.to_thread(self._decompress_to_cache, digest, compressed_path, cache_path)
+        await self._cached(size)
+
+    async def open(self, digest: str) -> Optional[mmap.mmap]:
+        """
+        Memory-map a blob's content
+        Returns None for an empty blob (which cannot be mapped).
+        Fetches and decompresses into the local cache on first access.
+        """
+        cache_path = _shard(self.cache_dir, digest)
+
+        if not await asyncio.to_thread(os.path.exists, cache_path):
+            await self._fetch(digest, cache_path)
+
+        def map_file() -> Optional[mmap.mmap]:
+            # Once open, the mapping survives the file being evicted
+            with open(cache_path, "rb") as f:
+                os.utime(f.fileno())  # mark as recently used
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            return await asyncio.to_thread(map_file)
+        except FileNotFoundError:
+            # Evicted between the check and the open; fetch it again
+            await self._fetch(digest, cache_path)
+            return await asyncio.to_thread(map_file)
+
+    async def read_text(self, digest: str) -> str:
+        """Decode a blob straight from its memory map into a str"""
+        mapped = await self.open(digest)
+        if mapped is None:
+            return ""
+        try:
+            return str(mapped, "utf-8")
+        finally:
+            mapped.close()
+
+    @staticmethod
+    def _decompress_to_cache(digest: str, compressed_path: str, cache_path: str) -> int:
+        def write(out):
+            decompressor = zlib.decompressobj()
+            hasher = hashlib.sha256()
+            with open(compressed_path, "rb") as src:
+                while chunk := src.read(CHUNK_SIZE):
+                    data = decompressor.decompress(chunk)
+                    hasher.update(data)
+                    out.write(data)
+            data = decompressor.flush()
+            hasher.update(data)
+            out.write(data)
+
+            if hasher.hexdigest() != digest:
+                raise ValueError(f"Blob {digest} is corrupt")
+
+        return atomic_write(cache_path, write)
+
+
+def _backend():
+    if settings.BLOB_BACKEND == "local":
+        return LocalBlobBackend(settings.BLOB_STORE_DIR)
+    return SupabaseStorageBackend(settings.BLOB_STORAGE_BUCKET)
+
+
+blob_store = BlobStore(_backend(), settings.BLOB_CACHE_DIR, settings.BLOB_CACHE_MAX_BYTES)
+
+
+async def testcase_text(tc: dict, field: str) -> str:
+    """
+    Get a testcase field ("input" or "expected_output")
+    Large values are stored as blobs and referenced by <field>_hash.
+    """
+    digest = tc.get(f"{field}_hash")
+    if digest:
+        return await blob_store.read_text(digest)
+    return tc.get(field) or ""
+
+
+async def testcase_fields(field: str, value: str) -> dict:
+    """
+    Build the row columns for a testcase field
+    Values above BLOB_INLINE_LIMIT bytes go to the blob store.
+    """
+    data = value.encode("utf-8")
+    if len(data) <= settings.BLOB_INLINE_LIMIT:
+        return {field: value, f"{field}_hash": None}
+
+    digest = await blob_store.put(data)
+    return {field: "", f"{field}_hash": digest}
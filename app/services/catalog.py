@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.supabase import SupabaseClient, select
+
+sb_admin = SupabaseClient(admin=True)
+
+PROBLEM_LIST_COLUMNS = ("id", "title", "slug", "difficulty", "tags")
+
+
+class Catalog:
+    """
+    Cached languages and problem list
+    Both change rarely and are read on nearly every request, so they are
+    kept in memory for CATALOG_TTL_SECONDS. Admin edits to problems
+    invalidate the list in this worker; other workers catch up within the TTL.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._languages: Optional[Dict[str, dict]] = None
+        self._languages_at = 0.0
+        self._problems: Optional[List[dict]] = None
+        self._problems_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl
+
+    async def languages(self) -> Dict[str, dict]:
+        """All languages, by slug"""
+        if self._languages is None or not self._fresh(self._languages_at):
+            async with self._lock:
+                if self._languages is None or not self._fresh(self._languages_at):
+                    rows = await sb_admin.get("languages", {"select": "*"})
+                    self._languages = {lang["slug"]: lang for lang in rows}
+                    self._languages_at = time.monotonic()
+        return self._languages
+
+    async def language(self, slug: str) -> Optional[dict]:
+        return (await self.languages()).get(slug)
+
+    async def problems(self) -> List[dict]:
+        """The problem list (copies, safe to modify)"""
+        if self._problems is None or not self._fresh(self._problems_at):
+            async with self._lock:
+                if self._problems is None or not self._fresh(self._problems_at):
+                    self._problems = await sb_admin.get("problems", select(*PROBLEM_LIST_COLUMNS))
+                    self._problems_at = time.monotonic()
+        return [dict(problem) for problem in self._problems]
+
+    def invalidate_problems(self):
+        self._problems = None
+
+
+catalog = Catalog(settings.CATALOG_TTL_SECONDS)
@@ -0,0 +1,182 @@
+import asyncio
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.blobs import blob_hash
+from app.services.supabase import SupabaseClient, select
+from app.services.shared_state import shared_state
+from app.services import metrics
+
+sb_admin = SupabaseClient(admin=True)
+
+TABLE = "content_blobs"
+
+# A sha256 reference column on the referencing row
+HASH_BYTES = 64
+# content_blobs row beyond its data: hash, size and the tuple header
+ROW_OVERHEAD_BYTES = HASH_BYTES + 8 + 24
+
+
+class ContentMissing(LookupError):
+    """A hash reference whose content_blobs row is missing or unreadable"""
+
+
+def _compress(data: bytes) -> bytes:
+    return zlib.compress(data, 6)
+
+
+def _encode_bytea(data: bytes) -> str:
+    """PostgREST takes and returns bytea as "\\x<hex>" """
+    return "\\x" + data.hex()
+
+
+def _decompress(payload: str) -> str:
+    return zlib.decompress(bytes.fromhex(payload[2:])).decode("utf-8")
+
+
+class ContentStore:
+    """
+    Deduplicated, compressed storage for submission code and outputs
+    Text is stored once in content_blobs (data is bytea, zlib-compressed),
+    keyed by its sha256; rows reference it by hash. Hashes known to be
+    stored are remembered in shared state, so repeated content (resubmits,
+    identical outputs) isn't uploaded again. Reads fetch and decompress
+    on demand, through a small LRU cache.
+
+    Only worth it for larger texts: stored_fields keeps anything up to
+    CONTENT_INLINE_LIMIT bytes inline.
+    """
+
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def _remember(self, digest: str, text: str):
+        self._cache[digest] = text
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def put_many(self, texts: List[str]) -> List[str]:
+        """Store texts (one batched upsert) and return their hashes in order"""
+        encoded = [text.encode("utf-8") for text in texts]
+        digests = [blob_hash(data) for data in encoded]
+
+        unique = list(dict.fromkeys(digests))
+        known = await shared_state.mget([f"cblob:{digest}" for digest in unique])
+        known_digests = {digest for digest, seen in zip(unique, known) if seen}
+
+        new_rows: Dict[str, dict] = {}
+        raw_bytes = stored_bytes = dedup_hits = 0
+
+        for text, data, digest in zip(texts, encoded, digests):
+            raw_bytes += len(data)
+            if digest in new_rows or digest in known_digests:
+                dedup_hits += 1
+                continue
+
+            payload = await asyncio.to_thread(_compress, data)
+            stored_bytes += len(payload) + ROW_OVERHEAD_BYTES
+            new_rows[digest] = {
+                "hash": digest,
+                "data": _encode_bytea(payload),
+                "size": len(data),
+            }
+            self._remember(digest, text)
+
+        if new_rows:
+            await sb_admin.upsert(TABLE, list(new_rows.values()), ignore_duplicates=True)
+            await shared_state.mset(
+                {f"cblob:{digest}": 1 for digest in new_rows},
+                ttl=settings.CONTENT_KNOWN_TTL_SECONDS,
+            )
+
+        await metrics.incr("content_raw_bytes", raw_bytes)
+        await metrics.incr("content_stored_bytes", stored_bytes)
+        await metrics.incr("content_ref_bytes", HASH_BYTES * len(texts))
+        await metrics.incr("content_dedup_hits", dedup_hits)
+        return digests
+
+    async def put(self, text: str) -> str:
+        return (await self.put_many([text]))[0]
+
+    async def get_many(self, digests: List[str]) -> Dict[str, str]:
+        """Fetch and decompress texts by hash (missing or unreadable ones are left out)"""
+        found = {}
+        missing = []
+        for digest in set(digests):
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                found[digest] = self._cache[digest]
+            else:
+                missing.append(digest)
+
+        if missing:
+            rows = await sb_admin.get(TABLE, {"hash": f"in.({','.join(missing)})", **select("hash", "data")})
+            for row in rows:
+                try:
+                    text = await asyncio.to_thread(_decompress, row["data"])
+                except (zlib.error, ValueError) as e:
+                    print(f"Warning: Unreadable content blob {row['hash']}: {e}")
+                    continue
+                self._remember(row["hash"], text)
+                found[row["hash"]] = text
+
+        return found
+
+    async def get(self, digest: str) -> Optional[str]:
+        return (await self.get_many([digest])).get(digest)
+
+    async def stats(self) -> dict:
+        """Bytes saved for hashed texts, net of hash references and blob rows"""
+        counters = await metrics.snapshot()
+        raw = counters.get("content_raw_bytes", 0)
+        stored = counters.get("content_stored_bytes", 0) + counters.get("content_ref_bytes", 0)
+        return {
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "saved_bytes": raw - stored,
+            "saved_ratio": round(1 - stored / raw, 4) if raw else 0.0,
+            "dedup_hits": counters.get("content_dedup_hits", 0),
+        }
+
+
+content_store = ContentStore(settings.CONTENT_CACHE_SIZE)
+
+
+async def submission_code(row: dict) -> str:
+    """
+    Source code of a submissions row (stored by hash, or inline)
+    Raises ContentMissing if the referenced content can't be read.
+    """
+    if row.get("code_hash"):
+        code = await content_store.get(row["code_hash"])
+        if code is None:
+            raise ContentMissing(f"Code of submission {row.get('id')} ({row['code_hash']}) is missing or unreadable")
+        return code
+    return row.get("code") or ""
+
+
+async def stored_fields(field: str, texts: List[str]) -> List[dict]:
+    """
+    Build row columns for texts: <field> inline, or <field>_hash
+    Texts up to CONTENT_INLINE_LIMIT bytes stay inline. Every row gets
+    both columns, so the rows can go in one bulk insert. Falls back to
+    storing everything inline if the content store fails.
+    """
+    large = [text for text in texts if len(text.encode("utf-8")) > settings.CONTENT_INLINE_LIMIT]
+    try:
+        digests = iter(await content_store.put_many(large)) if large else iter(())
+    except Exception as e:
+        print(f"Warning: Content store unavailable, storing {field} inline: {e}")
+        return [{field: text, f"{field}_hash": None} for text in texts]
+
+    fields = []
+    for text in texts:
+        if len(text.encode("utf-8")) > settings.CONTENT_INLINE_LIMIT:
+            fields.append({field: "", f"{field}_hash": next(digests)})
+        else:
+            fields.append({field: text, f"{field}_hash": None})
+    return fields
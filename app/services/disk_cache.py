@@ -0,0 +1,70 @@
+import fcntl
+import os
+import tempfile
+from typing import BinaryIO, Callable, List, Tuple
+
+
+def atomic_write(path: str, write: Callable[[BinaryIO], None]) -> int:
+    """
+    Write through a temp file in the same directory, then rename into place
+    Returns the size of the written file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            size = f.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return size
+
+
+def cache_entries(root: str) -> List[Tuple[float, int, str]]:
+    """(mtime, size, path) of every cache file under root, skipping dotfiles (locks, temp files)"""
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.startswith("."):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict_lru(root: str, max_bytes: int) -> int:
+    """
+    Delete least recently used files until under 90% of max_bytes
+    Runs under an exclusive lock on <root>/.lock, so workers sharing the
+    directory never evict at the same time. Readers mark files as used by
+    touching their mtime, and must treat a vanished file as a miss.
+    Returns the number of files deleted.
+    """
+    if not os.path.isdir(root):
+        return 0
+    with open(os.path.join(root, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        entries = cache_entries(root)
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return 0
+
+        target = int(max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                evicted += 1
+            except FileNotFoundError:
+                pass
+        return evicted
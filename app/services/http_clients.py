@@ -0,0 +1,27 @@
+from typing import Dict
+
+import httpx
+
+# Long-lived clients keep connections (and TLS sessions) open between calls
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+
+def http_client(name: str, timeout: float = 30.0) -> httpx.AsyncClient:
+    """
+    Get the shared, pooled client for an upstream ("supabase", "piston", ...)
+    Created on first use; pass a per-request timeout to override the default.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=timeout, limits=LIMITS)
+        _clients[name] = client
+    return client
+
+
+async def close_all():
+    """Close every shared client (on shutdown)"""
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.schemas import ExecutionLimits, Verdict
+from app.services.piston import run_code
+from app.services.evaluator import is_correct
+from app.services.blobs import testcase_text
+from app.services.shared_state import SharedSemaphore
+from app.services import metrics
+
+# Global limit on executor calls in flight, shared by every request in every worker
+executor_slots = SharedSemaphore("slots:executor", settings.EXECUTOR_CONCURRENCY, settings.EXECUTOR_SLOT_LEASE_SECONDS)
+
+
+async def wait_for_free_slot(poll_seconds: float = 0.5):
+    """Wait until an executor slot is free (background work yields to live requests)"""
+    while await executor_slots.locked():
+        await asyncio.sleep(poll_seconds)
+
+
+async def run_testcase(executor_lang: str, code: str, tc: dict, limits: Optional[ExecutionLimits] = None) -> Dict:
+    """Run code against one testcase and check the output"""
+    # Large inputs are blob references, loaded one testcase at a time
+    tc_input = await testcase_text(tc, "input")
+
+    async with executor_slots.slot():
+        start_time = time.time()
+        result = await run_code(executor_lang, code, tc_input, limits=limits)
+        duration_ms = int((time.time() - start_time) * 1000)
+
+    # Prefer executor-reported CPU time; the round trip mostly measures the network
+    if result.cpu_ms is not None:
+        runtime_ms = result.cpu_ms
+    elif result.wall_ms is not None:
+        runtime_ms = result.wall_ms
+    else:
+        runtime_ms = duration_ms
+
+    if result.verdict == Verdict.AC and not is_correct(await testcase_text(tc, "expected_output"), result.stdout):
+        result.verdict = Verdict.WA
+    passed = result.verdict == Verdict.AC
+
+    return {
+        "testcase_id": str(tc["id"]),
+        "passed": passed,
+        "verdict": result.verdict.value,
+        "is_error": result.is_error,
+        "points": tc.get("points", 0) if passed else 0,
+        "output": result.display(),
+        "runtime_ms": runtime_ms,
+        "cpu_ms": result.cpu_ms,
+        "wall_ms": result.wall_ms,
+        "memory_kb": result.memory_kb,
+    }
+
+
+async def judge(
+    executor_lang: str,
+    code: str,
+    testcases: List[dict],
+    fail_fast: bool = False,
+    limits: Optional[ExecutionLimits] = None,
+    concurrency: Optional[int] = None,
+    before_run: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Dict:
+    """
+    Run code against testcases, dispatched in the given order
+    At most `concurrency` testcases of one submission run at once
+    (JUDGE_SUBMISSION_CONCURRENCY by default), each also holding a global
+    executor slot, so a submission with many testcases can't queue ahead
+    of everyone else's. With fail_fast, the first failure stops dispatch
+    and cancels runs still in flight. before_run, if given, is awaited
+    before each run (the rejudger uses it for rate limiting).
+    """
+    concurrency = max(1, concurrency or settings.JUDGE_SUBMISSION_CONCURRENCY)
+    pending_idx = iter(range(len(testcases)))
+    finished: Dict[int, Dict] = {}
+    failed = False
+    workers: List[asyncio.Task] = []
+
+    async def worker():
+        nonlocal failed
+        # Workers share the iterator, so testcases start in dispatch order
+        for idx in pending_idx:
+            if fail_fast and failed:
+                return
+            if before_run:
+                await before_run()
+            res = await run_testcase(executor_lang, code, testcases[idx], limits)
+            finished[idx] = res
+            print(f"  {'✓' if res['passed'] else '✗'} {res['verdict']} test case {idx + 1}/{len(testcases)} ({res['runtime_ms']}ms)")
+
+            if not res["passed"]:
+                failed = True
+                if fail_fast:
+                    for other in workers:
+                        if other is not asyncio.current_task():
+                            other.cancel()
+                    return
+
+    workers.extend(asyncio.create_task(worker()) for _ in range(min(concurrency, len(testcases))))
+    try:
+        if workers:
+            await asyncio.wait(workers)
+        for task in workers:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+    finally:
+        for task in workers:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    stopped = len(finished) < len(testcases)
+
+    # Report in dispatch order
+    results = [finished[idx] for idx in sorted(finished)]
+    passed_count = sum(1 for res in results if res["passed"])
+
+    await metrics.incr("testcases_run", len(results))
+    if stopped:
+        print(f"  Fail-fast: skipped {len(testcases) - len(results)} remaining test cases")
+        await metrics.incr("testcases_skipped", len(testcases) - len(results))
+
+    # Overall verdict: the first non-AC verdict in dispatch order
+    verdict = next((res["verdict"] for res in results if not res["passed"]), Verdict.AC.value)
+
+    memory = [res["memory_kb"] for res in results if res["memory_kb"] is not None]
+
+    return {
+        "verdict": verdict,
+        # The slowest / hungriest testcase stands for the whole submission
+        "runtime_ms": max((res["runtime_ms"] for res in results), default=None),
+        "memory_kb": max(memory) if memory else None,
+        "results": results,
+        "passed_count": passed_count,
+        "total_score": sum(res["points"] for res in results),
+        "all_passed": passed_count == len(testcases),
+        "skipped": len(testcases) - len(results),
+        # Output of the first testcase, kept on the submission row
+        "main_output": results[0]["output"] if results else "",
+    }
@@ -0,0 +1,237 @@
+import asyncio
+import bisect
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app.services.supabase import SupabaseClient, select
+from app.services.shared_state import shared_state
+
+sb_admin = SupabaseClient(admin=True)
+
+# Held by the one worker that rebuilds from the database
+RECONCILE_LEASE = "lease:leaderboard-reconcile"
+SNAPSHOT_KEY = "leaderboard:snapshot"
+VERSION_KEY = "leaderboard:version"
+# How often workers check for a newer snapshot (and the lease holder renews)
+SYNC_SECONDS = 30
+# Per-problem submission counts requested at once during a rebuild
+COUNT_CONCURRENCY = 8
+
+
+class Leaderboard:
+    """
+    In-memory leaderboard and per-problem aggregates
+    Updated incrementally after each submission and periodically rebuilt
+    from user_progress / submissions to correct any drift.
+
+    Users are ranked by problems solved, then total score (sum of best
+    scores), then fewest attempts. The ranking is a sorted list of keys,
+    so rank lookups are a binary search.
+
+    Each rebuild is published to shared state; other workers load the
+    published snapshot instead of scanning the database themselves.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.version = 0
+        self._lock = asyncio.Lock()
+        self._load_lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        # (user_id, problem_id) -> {"solved": bool, "best_score": int}
+        self.progress: Dict[Tuple[str, str], dict] = {}
+        # user_id -> {"solved": int, "score": int, "attempts": int}
+        self.users: Dict[str, dict] = {}
+        # problem_id -> {"attempts": int, "accepted": int, "solvers": int}
+        self.problems: Dict[str, dict] = {}
+        self._ranking: List[tuple] = []
+
+    @staticmethod
+    def _key(user_id: str, totals: dict) -> tuple:
+        return (-totals["solved"], -totals["score"], totals["attempts"], user_id)
+
+    def _unrank(self, user_id: str):
+        totals = self.users.get(user_id)
+        if totals is None:
+            return
+        key = self._key(user_id, totals)
+        idx = bisect.bisect_left(self._ranking, key)
+        if idx < len(self._ranking) and self._ranking[idx] == key:
+            del self._ranking[idx]
+
+    def _rerank(self, user_id: str):
+        bisect.insort(self._ranking, self._key(user_id, self.users[user_id]))
+
+    def record_submission(self, user_id: str, problem_id: str, passed: bool, score: int):
+        """Apply one finished submission to the aggregates"""
+        user_id, problem_id = str(user_id), str(problem_id)
+
+        self._unrank(user_id)
+        totals = self.users.setdefault(user_id, {"solved": 0, "score": 0, "attempts": 0})
+        stats = self.problems.setdefault(problem_id, {"attempts": 0, "accepted": 0, "solvers": 0})
+        prog = self.progress.setdefault((user_id, problem_id), {"solved": False, "best_score": 0})
+
+        totals["attempts"] += 1
+        stats["attempts"] += 1
+        if passed:
+            stats["accepted"] += 1
+            if not prog["solved"]:
+                prog["solved"] = True
+                totals["solved"] += 1
+                stats["solvers"] += 1
+
+        if score > prog["best_score"]:
+            totals["score"] += score - prog["best_score"]
+            prog["best_score"] = score
+
+        self._rerank(user_id)
+
+    def top(self, limit: int = 50, offset: int = 0) -> List[dict]:
+        """Get a page of the ranking"""
+        entries = []
+        for idx, key in enumerate(self._ranking[offset:offset + limit]):
+            user_id = key[-1]
+            entries.append({"rank": offset + idx + 1, "user_id": user_id, **self.users[user_id]})
+        return entries
+
+    def rank(self, user_id: str) -> Optional[dict]:
+        """Get a user's rank and totals"""
+        totals = self.users.get(str(user_id))
+        if totals is None:
+            return None
+        idx = bisect.bisect_left(self._ranking, self._key(str(user_id), totals))
+        return {"rank": idx + 1, "user_id": str(user_id), **totals}
+
+    def problem_stats(self, problem_id: str) -> dict:
+        stats = self.problems.get(str(problem_id), {"attempts": 0, "accepted": 0, "solvers": 0})
+        rate = stats["accepted"] / stats["attempts"] if stats["attempts"] else 0.0
+        return {"problem_id": str(problem_id), **stats, "acceptance_rate": round(rate, 4)}
+
+    def user_count(self) -> int:
+        return len(self._ranking)
+
+    async def reconcile(self):
+        """Rebuild all aggregates from the database"""
+        async with self._lock:
+            progress = {}
+            users = {}
+            problems = {}
+
+            async for row in sb_admin.iter_rows(
+                "user_progress",
+                select("user_id", "problem_id", "solved", "best_score", "attempts")
+            ):
+                user_id, problem_id = str(row["user_id"]), str(row["problem_id"])
+                solved = bool(row.get("solved"))
+                best_score = row.get("best_score") or 0
+
+                progress[(user_id, problem_id)] = {"solved": solved, "best_score": best_score}
+
+                totals = users.setdefault(user_id, {"solved": 0, "score": 0, "attempts": 0})
+                totals["solved"] += int(solved)
+                totals["score"] += best_score
+                totals["attempts"] += row.get("attempts") or 0
+
+                stats = problems.setdefault(problem_id, {"attempts": 0, "accepted": 0, "solvers": 0})
+                stats["solvers"] += int(solved)
+
+            problem_ids = {str(row["id"]) for row in await sb_admin.get("problems", select("id"))}
+            gate = asyncio.Semaphore(COUNT_CONCURRENCY)
+
+            async def count_submissions(problem_id: str):
+                # Two HEAD counts per problem instead of downloading every submission
+                async with gate:
+                    attempts, accepted = await asyncio.gather(
+                        sb_admin.count("submissions", {"problem_id": f"eq.{problem_id}"}),
+                        sb_admin.count("submissions", {"problem_id": f"eq.{problem_id}", "passed": "eq.true"}),
+                    )
+                stats = problems.setdefault(problem_id, {"attempts": 0, "accepted": 0, "solvers": 0})
+                stats["attempts"] = attempts
+                stats["accepted"] = accepted
+
+            await asyncio.gather(*(count_submissions(problem_id) for problem_id in problem_ids | set(problems)))
+
+            self._install(progress, users, problems)
+
+        print(f"✓ Leaderboard reconciled: {len(users)} users, {len(problems)} problems")
+        await self._publish()
+
+    def _install(self, progress: Dict[Tuple[str, str], dict], users: Dict[str, dict], problems: Dict[str, dict]):
+        """Swap in rebuilt state in one step"""
+        self.progress = progress
+        self.users = users
+        self.problems = problems
+        self._ranking = sorted(self._key(user_id, totals) for user_id, totals in users.items())
+        self.loaded = True
+
+    async def _publish(self):
+        try:
+            version = await shared_state.incr(VERSION_KEY)
+            await shared_state.set(SNAPSHOT_KEY, {
+                "version": version,
+                "users": {user_id: dict(totals) for user_id, totals in self.users.items()},
+                "problems": {problem_id: dict(stats) for problem_id, stats in self.problems.items()},
+                "progress": [
+                    [user_id, problem_id, prog["solved"], prog["best_score"]]
+                    for (user_id, problem_id), prog in self.progress.items()
+                ],
+            })
+            self.version = version
+        except Exception as e:
+            print(f"Warning: Failed to publish leaderboard snapshot: {e}")
+
+    async def refresh(self) -> bool:
+        """Load the snapshot another worker published, if it is newer; True if loaded"""
+        version = await shared_state.get(VERSION_KEY)
+        if not version or version <= self.version:
+            return False
+        snapshot = await shared_state.get(SNAPSHOT_KEY)
+        if not snapshot or snapshot["version"] <= self.version:
+            return False
+
+        self._install(
+            {(user_id, problem_id): {"solved": solved, "best_score": best_score}
+             for user_id, problem_id, solved, best_score in snapshot["progress"]},
+            {user_id: dict(totals) for user_id, totals in snapshot["users"].items()},
+            {problem_id: dict(stats) for problem_id, stats in snapshot["problems"].items()},
+        )
+        self.version = snapshot["version"]
+        return True
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if not self.loaded and not await self.refresh():
+                await self.reconcile()
+
+    async def sync(self, holder: str, interval_seconds: int, last_rebuild: float) -> float:
+        """
+        One reconciler step; returns when the database was last scanned
+        The lease holder rebuilds once interval_seconds have passed; every
+        other worker (and the holder in between) loads newer snapshots.
+        """
+        is_holder = await shared_state.acquire(RECONCILE_LEASE, 1, holder, SYNC_SECONDS * 3)
+        if is_holder and time.monotonic() - last_rebuild >= interval_seconds:
+            await self.reconcile()
+            return time.monotonic()
+        await self.refresh()
+        return last_rebuild
+
+    async def run_reconciler(self, interval_seconds: int):
+        """Keep aggregates in sync with the database, one worker scanning at a time"""
+        holder = f"{os.getpid()}:{uuid.uuid4().hex}"
+        last_rebuild = 0.0
+        while True:
+            try:
+                last_rebuild = await self.sync(holder, interval_seconds, last_rebuild)
+            except Exception as e:
+                print(f"Warning: Leaderboard reconcile failed: {e}")
+            await asyncio.sleep(min(interval_seconds, SYNC_SECONDS))
+
+
+leaderboard = Leaderboard()
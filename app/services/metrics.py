@@ -0,0 +1,17 @@
+from typing import Dict
+
+from app.services.shared_state import shared_state
+
+METRICS_KEY = "metrics"
+
+
+async def incr(name: str, amount: int = 1):
+    """Bump a counter shared by all workers (never raises)"""
+    try:
+        await shared_state.hincr(METRICS_KEY, name, amount)
+    except Exception as e:
+        print(f"Warning: Failed to record metric {name}: {e}")
+
+
+async def snapshot() -> Dict[str, int]:
+    return await shared_state.hgetall(METRICS_KEY)
@@ -0,0 +1,109 @@
+import asyncio
+import math
+from typing import Dict, Optional
+
+from app.services.supabase import SupabaseClient, select
+from app.services.shared_state import shared_state
+
+sb_admin = SupabaseClient(admin=True)
+
+# Buckets grow geometrically (~5% wide), so a few hundred cover 1ms..1h and 1KB..1TB
+BUCKET_RATIO = 1.05
+SEEDED_FIELD = "_seeded"
+METRICS = ("runtime_ms", "memory_kb")
+
+
+def bucket(value: int) -> int:
+    return int(math.log(max(value, 0) + 1) / math.log(BUCKET_RATIO))
+
+
+def beats(histogram: Dict[str, int], value: int) -> Optional[float]:
+    """Percentage of recorded values worse (higher) than value; ties count half"""
+    idx = bucket(value)
+    total = worse = same = 0
+    for key, count in histogram.items():
+        if key == SEEDED_FIELD:
+            continue
+        total += count
+        if int(key) > idx:
+            worse += count
+        elif int(key) == idx:
+            same += count
+    if not total:
+        return None
+    return round(100 * (worse + same / 2) / total, 2)
+
+
+class PercentileTracker:
+    """
+    Runtime and memory histograms of accepted submissions
+    One histogram per (problem, language, metric), kept in shared state and
+    updated as submissions are accepted, so "beats X%" never needs to look
+    at past submissions. Histograms are seeded once from
+    submissions.runtime_ms / memory_kb when first used.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(problem_id: str, language: str, metric: str) -> str:
+        return f"hist:{metric}:{problem_id}:{language}"
+
+    async def _load(self, problem_id: str, language: str, submission_id: str) -> Dict[str, Dict[str, int]]:
+        async with self._lock:
+            histograms = {
+                metric: await shared_state.hgetall(self._key(problem_id, language, metric))
+                for metric in METRICS
+            }
+            if all(SEEDED_FIELD in hist for hist in histograms.values()):
+                return histograms
+
+            histograms = {metric: {} for metric in METRICS}
+            async for row in sb_admin.iter_rows(
+                "submissions",
+                {
+                    "problem_id": f"eq.{problem_id}",
+                    "language_slug": f"eq.{language}",
+                    "passed": "eq.true",
+                    "runtime_ms": "not.is.null",
+                    # Already inserted; rank_and_record adds it itself
+                    "id": f"neq.{submission_id}",
+                    **select("runtime_ms", "memory_kb"),
+                },
+            ):
+                for metric in METRICS:
+                    if row.get(metric) is not None:
+                        key = str(bucket(row[metric]))
+                        histograms[metric][key] = histograms[metric].get(key, 0) + 1
+
+            for metric, hist in histograms.items():
+                hist[SEEDED_FIELD] = 1
+                await shared_state.set(self._key(problem_id, language, metric), hist)
+            return histograms
+
+    async def rank_and_record(
+        self, problem_id: str, language: str, submission_id: str, runtime_ms: Optional[int], memory_kb: Optional[int]
+    ) -> dict:
+        """
+        Rank an accepted submission against earlier ones, then add it
+        Returns {"runtime_beats": %, "memory_beats": %} (None when there is
+        nothing to compare against yet).
+        """
+        values = {"runtime_ms": runtime_ms, "memory_kb": memory_kb}
+        ranks = {"runtime_beats": None, "memory_beats": None}
+
+        try:
+            histograms = await self._load(str(problem_id), language, str(submission_id))
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                ranks[f"{metric.split('_')[0]}_beats"] = beats(histograms[metric], value)
+                await shared_state.hincr(self._key(str(problem_id), language, metric), str(bucket(value)))
+        except Exception as e:
+            print(f"Warning: Percentile ranking failed: {e}")
+
+        return ranks
+
+
+percentiles = PercentileTracker()
@@ -1,13 +1,57 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.schemas import ExecutionLimits, ExecutionResult, Verdict
+from app.services.artifact_cache import artifact_cache
+from app.services.profiler import span
+from app.services.http_clients import http_client
 
 PISTON_URL = "https://emkc.org/api/v2/piston/execute"
+PISTON_RUNTIMES_URL = "https://emkc.org/api/v2/piston/runtimes"
 
-async def run_code(language: str, code: str, stdin: str, version: str = "*") -> str:
+COMPILE_TIMEOUT_MS = 10000
+# Extra time allowed for the HTTP round trip on top of compile + run limits
+HTTP_SLACK_SECONDS = 5.0
+
+
+def execution_limits(problem: Optional[dict], lang_config: Optional[dict]) -> ExecutionLimits:
+    """
+    Resolve time/memory limits for a problem in a language
+    The problem sets the base limits (problems.time_limit_ms / memory_limit_kb);
+    the language scales time (languages.time_multiplier) and adds memory
+    headroom (languages.memory_overhead_kb), e.g. for the JVM. Problems
+    without limits get the defaults, which don't cap memory unless
+    DEFAULT_MEMORY_LIMIT_KB is set.
+    """
+    problem = problem or {}
+    lang_config = lang_config or {}
+
+    time_ms = problem.get("time_limit_ms") or settings.DEFAULT_TIME_LIMIT_MS
+    memory_kb = problem.get("memory_limit_kb") or settings.DEFAULT_MEMORY_LIMIT_KB
+
+    time_ms = int(time_ms * (lang_config.get("time_multiplier") or 1))
+    if memory_kb:
+        memory_kb = int(memory_kb + (lang_config.get("memory_overhead_kb") or 0))
+    else:
+        memory_kb = None
+
+    return ExecutionLimits(time_ms=time_ms, memory_kb=memory_kb)
+
+
+async def run_code(
+    language: str,
+    code: str,
+    stdin: str,
+    version: str = "*",
+    limits: Optional[ExecutionLimits] = None,
+) -> ExecutionResult:
     """
     Execute code using Piston API
-    Returns the output (stdout) or error message
+    Returns a structured result; a clean run is reported as AC and the
+    caller decides between AC and WA by checking the output.
     """
+    limits = limits or execution_limits(None, None)
+
     payload = {
         "language": language,
         "version": version,
@@ -18,50 +62,95 @@ async def run_code(language: str, code: str, stdin: str, version: str = "*") ->
             }
         ],
         "stdin": stdin,
-        "compile_timeout": 10000,
-        "run_timeout": 3000,
+        "compile_timeout": COMPILE_TIMEOUT_MS,
+        "run_timeout": limits.time_ms,
         "compile_memory_limit": -1,
-        "run_memory_limit": -1
+        "run_memory_limit": limits.memory_kb * 1024 if limits.memory_kb else -1
     }
 
+    if settings.ARTIFACT_CACHE_ENABLED:
+        cached = await artifact_cache.get(language, code, stdin, limits)
+        if cached is not None:
+            return cached
+
+    # Never hold a connection (and an executor slot) much longer than the limits allow
+    http_timeout = (COMPILE_TIMEOUT_MS + limits.time_ms) / 1000 + HTTP_SLACK_SECONDS
+
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            res = await client.post(PISTON_URL, json=payload)
-            res.raise_for_status()
-            
-            data = res.json()
-            
-            # Check if there's a compile stage (for compiled languages)
-            if "compile" in data and data["compile"].get("code") != 0:
-                compile_output = data["compile"].get("stderr") or data["compile"].get("stdout") or "Compilation failed"
-                return f"Compilation Error:\n{compile_output}"
-            
-            # Get run stage output
-            run_stage = data.get("run", {})
-            
-            # Check for runtime errors
-            if run_stage.get("code") != 0:
-                error_output = run_stage.get("stderr", "")
-                if error_output:
-                    return f"Runtime Error:\n{error_output}"
-            
-            # Return stdout (the actual output)
-            output = run_stage.get("stdout", "").strip()
-            
-            # If no stdout but there's stderr, return that
-            if not output:
-                stderr = run_stage.get("stderr", "").strip()
-                if stderr:
-                    return stderr
-            
-            return output
-            
+        client = http_client("piston")
+        with span(f"executor {language}"):
+            res = await client.post(PISTON_URL, json=payload, timeout=http_timeout)
+        res.raise_for_status()
+
+        data = res.json()
+
+        result = parse_result(data, limits)
+
+        if settings.ARTIFACT_CACHE_ENABLED:
+            artifact_cache.learn_version(language, data.get("version"))
+            if result.verdict == Verdict.CE:
+                await artifact_cache.put_compile_error(language, code, result)
+            elif result.verdict == Verdict.AC:
+                await artifact_cache.put_run(language, code, stdin, limits, result)
+
+        return result
+
     except httpx.TimeoutException:
-        return "Error: Code execution timed out (max 30s)"
+        return ExecutionResult(verdict=Verdict.IE, stderr=f"Code execution timed out (max {int(http_timeout)}s)")
     except httpx.HTTPError as e:
-        return f"Error: Failed to execute code - {str(e)}"
+        return ExecutionResult(verdict=Verdict.IE, stderr=f"Failed to execute code - {str(e)}")
     except Exception as e:
-        return f"Error: {str(e)}"
+        return ExecutionResult(verdict=Verdict.IE, stderr=str(e))
+
+
+def parse_result(data: dict, limits: ExecutionLimits) -> ExecutionResult:
+    """Turn a Piston response into a structured result"""
+    # Check if there's a compile stage (for compiled languages)
+    compile_stage = data.get("compile")
+    if compile_stage and compile_stage.get("code") != 0:
+        return ExecutionResult(
+            verdict=Verdict.CE,
+            stdout=compile_stage.get("stdout") or "",
+            stderr=compile_stage.get("stderr") or "",
+        )
+
+    # Get run stage output
+    run_stage = data.get("run", {})
+    stdout = run_stage.get("stdout") or ""
+    stderr = run_stage.get("stderr") or ""
+
+    # Newer Piston versions report usage (cpu/wall time in ms, memory in bytes)
+    cpu_ms = run_stage.get("cpu_time")
+    wall_ms = run_stage.get("wall_time")
+    memory = run_stage.get("memory")
+    memory_kb = memory // 1024 if memory is not None else None
+
+    verdict = Verdict.AC
+    status = run_stage.get("status")
+
+    if status == "TO" or (cpu_ms is not None and cpu_ms > limits.time_ms):
+        verdict = Verdict.TLE
+    elif status in ("OL", "EL"):
+        verdict = Verdict.OLE
+    elif status == "XX":
+        verdict = Verdict.IE
+    elif run_stage.get("code") != 0 or run_stage.get("signal"):
+        # Hitting the memory cap surfaces as a crash or a kill
+        if limits.memory_kb and memory_kb is not None and memory_kb >= limits.memory_kb * 0.95:
+            verdict = Verdict.MLE
+        elif run_stage.get("signal") == "SIGKILL" and wall_ms is not None and wall_ms >= limits.time_ms:
+            verdict = Verdict.TLE
+        else:
+            verdict = Verdict.RE
+
+    return ExecutionResult(
+        verdict=verdict,
+        stdout=stdout,
+        stderr=stderr if verdict != Verdict.IE else (run_stage.get("message") or stderr),
+        cpu_ms=cpu_ms,
+        wall_ms=wall_ms,
+        memory_kb=memory_kb,
+    )
 
 
 def get_file_extension(language: str) -> str:
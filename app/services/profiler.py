@@ -0,0 +1,195 @@
+import asyncio
+import cProfile
+import json
+import os
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.config import settings
+
+PROFILE_HEADER = "x-profile"
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+# cProfile hooks the whole thread, so only one request can hold it at a time
+_cprofile_busy = False
+
+
+class RequestProfile:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+
+    def summary(self) -> Dict[str, dict]:
+        """Total time and count per span name"""
+        totals: Dict[str, dict] = {}
+        for item in self.spans:
+            entry = totals.setdefault(item["name"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + item["duration_ms"], 3)
+        return totals
+
+
+class span:
+    """
+    Time a block as part of the current request's profile
+    A no-op unless the request is being profiled. Works around awaits
+    (`with span("supabase.get"): await ...`); tasks spawned by the request
+    inherit the profile, so concurrent spans are all recorded.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = _current.get()
+        if self.profile:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile:
+            end = time.perf_counter()
+            self.profile.spans.append({
+                "name": self.name,
+                "start_ms": round((self.start - self.profile.started) * 1000, 3),
+                "duration_ms": round((end - self.start) * 1000, 3),
+            })
+        return False
+
+
+async def _is_admin(request: Request) -> bool:
+    # Imported here: both (through supabase) import this module
+    from app.services.auth import get_user_from_token
+    from app.services.profiles import get_profile
+
+    authorization = request.headers.get("authorization", "")
+    if not authorization.startswith("Bearer "):
+        return False
+    try:
+        user = await get_user_from_token(authorization.replace("Bearer ", ""))
+        profile = await get_profile(user["id"])
+    except Exception:
+        return False
+    return bool(profile) and profile.get("role") == "admin"
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Opt-in per-request profiling
+    A request is profiled when an admin sends `X-Profile: 1`, or when it
+    falls in the PROFILING_SAMPLE_RATE sample. Each profile is written to
+    PROFILING_DIR as <id>.prof (cProfile/pstats format, when the profiler
+    was free) plus <id>.json with the per-span (per-await) breakdown.
+
+    cProfile sees everything on the event loop while it runs, so requests
+    overlapping a profiled one show up in its .prof too; the span breakdown
+    only covers the profiled request.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        global _cprofile_busy
+
+        wanted = request.headers.get(PROFILE_HEADER) == "1" and await _is_admin(request)
+        if not wanted and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await call_next(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+
+        profiler = None
+        if not _cprofile_busy:
+            _cprofile_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            if profiler:
+                profiler.disable()
+                _cprofile_busy = False
+            _current.reset(token)
+
+            total_ms = round((time.perf_counter() - profile.started) * 1000, 3)
+            meta = {
+                "id": profile.id,
+                "method": request.method,
+                "path": request.url.path,
+                "status": status,
+                "total_ms": total_ms,
+                "trigger": "header" if wanted else "sample",
+                "has_cprofile": profiler is not None,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "summary": profile.summary(),
+                "spans": profile.spans,
+            }
+            try:
+                await asyncio.to_thread(_write_profile, meta, profiler)
+            except OSError as e:
+                print(f"Warning: Failed to write profile: {e}")
+
+        response.headers["X-Profile-Id"] = profile.id
+        return response
+
+
+def _write_profile(meta: dict, profiler: Optional[cProfile.Profile]):
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILING_DIR, meta["id"])
+    if profiler:
+        profiler.dump_stats(f"{base}.prof")
+    with open(f"{base}.json", "w") as f:
+        json.dump(meta, f)
+
+    # Keep only the newest PROFILING_MAX_FILES profiles
+    metas = sorted(
+        (entry for entry in os.scandir(settings.PROFILING_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in metas[:-settings.PROFILING_MAX_FILES]:
+        for ext in (".json", ".prof"):
+            try:
+                os.unlink(entry.path[:-len(".json")] + ext)
+            except FileNotFoundError:
+                pass
+
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+def profile_path(profile_id: str, ext: str) -> Optional[str]:
+    """Path of a stored profile file, or None if the id is invalid or missing"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, f"{profile_id}.{ext}")
+    return path if os.path.exists(path) else None
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first (without the full span list)"""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILING_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop("spans", None)
+        profiles.append(meta)
+    return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
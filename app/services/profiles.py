@@ -0,0 +1,40 @@
+from typing import Optional
+
+from app.config import settings
+from app.services.supabase import SupabaseClient
+from app.services.shared_state import shared_state
+
+sb_admin = SupabaseClient(admin=True)
+
+
+def _key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+
+async def get_profile(user_id: str) -> Optional[dict]:
+    """
+    Get a user's profile row, cached for PROFILE_CACHE_TTL_SECONDS
+    Shared by require_admin and /auth/me; the cache lives in shared state,
+    so it is bounded and common to all workers.
+    """
+    cached = await shared_state.get(_key(user_id))
+    # Only trust an entry that is really this user's profile
+    if isinstance(cached, dict) and str(cached.get("id")) == str(user_id):
+        return dict(cached)
+
+    profiles = await sb_admin.get("profiles", {"id": f"eq.{user_id}"})
+    if not profiles:
+        return None
+
+    await cache_profile(profiles[0])
+    return dict(profiles[0])
+
+
+async def cache_profile(profile: dict):
+    """Store a freshly created or updated profile"""
+    await shared_state.set(_key(profile["id"]), dict(profile), ttl=settings.PROFILE_CACHE_TTL_SECONDS)
+
+
+async def invalidate_profile(user_id: str):
+    """Drop a cached profile after it changes"""
+    await shared_state.delete(_key(user_id))
@@ -0,0 +1,345 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.supabase import SupabaseClient, select
+from app.services.judge import judge, wait_for_free_slot
+from app.schemas import Verdict
+from app.services.piston import execution_limits
+from app.services.shared_state import shared_state
+from app.services.leaderboard import leaderboard
+from app.services.content_store import ContentMissing, stored_fields, submission_code
+from app.services.catalog import catalog
+
+sb_admin = SupabaseClient(admin=True)
+
+TABLE = "rejudge_jobs"
+# Columns written at every checkpoint
+PROGRESS_FIELDS = (
+    "status", "cursor", "checked", "failed", "failed_users", "passing_users",
+    "skipped_users", "skipped", "error", "finished_at", "lease_until",
+)
+# Columns shown by list_jobs (the *_users lists are internal)
+LIST_FIELDS = (
+    "id", "problem_id", "testcase_ids", "status", "cursor", "checked", "failed",
+    "skipped", "error", "created_at", "finished_at",
+)
+
+
+class LeaseLost(Exception):
+    """This worker's lease on a job ran out and another worker took it over"""
+
+
+class RetryLater(Exception):
+    """The executor couldn't judge a submission; the job resumes from its checkpoint"""
+
+
+class Rejudger:
+    """
+    Background delta rejudge of accepted submissions
+    When testcases are added to a problem, a job runs just those testcases
+    against the problem's accepted submissions. Submissions that now fail
+    lose their accepted status, and users left with no accepted submission
+    lose "solved". Submissions that still pass gain the new testcases'
+    points (submissions.score and user_progress.best_score). Submissions
+    whose code can't be read are skipped and listed on the job, and never
+    change anyone's status. If the executor fails (IE: timeout, HTTP
+    error, outage), the job stops at its last checkpoint and is retried
+    after REJUDGE_RETRY_SECONDS; only real verdicts (WA/RE/TLE/MLE/OLE/CE)
+    un-accept a submission.
+
+    Jobs are rows in rejudge_jobs, checkpointed after every batch, so they
+    resume after a restart or redeploy on any instance. A worker claims a
+    job by taking its lease (REJUDGE_LEASE_SECONDS, renewed at each
+    checkpoint); a job whose lease ran out is picked up by another worker.
+    Runs are dispatched one at a time; each takes a token from a shared
+    bucket (REJUDGE_RUNS_PER_SECOND) and waits until live traffic leaves
+    an executor slot free.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = asyncio.Event()
+
+    @staticmethod
+    def _lease_until(seconds: Optional[float] = None) -> str:
+        if seconds is None:
+            seconds = settings.REJUDGE_LEASE_SECONDS
+        return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+    async def _save(self, job: dict):
+        """
+        Write job progress, renewing this worker's lease while it runs
+        A stopped job keeps whatever lease_until the caller set (a paused
+        job holds it until its retry time).
+        """
+        if job["status"] == "running":
+            job["lease_until"] = self._lease_until()
+        rows = await sb_admin.patch(
+            TABLE,
+            {"id": f"eq.{job['id']}", "lease_owner": f"eq.{self.owner}"},
+            {field: job[field] for field in PROGRESS_FIELDS},
+        )
+        if not rows:
+            raise LeaseLost(f"Rejudge {job['id']} was taken over by another worker")
+
+    async def _claim(self, job_id: str) -> Optional[dict]:
+        """Take a job no live worker holds; None if another worker has it"""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = await sb_admin.patch(
+            TABLE,
+            {
+                "id": f"eq.{job_id}",
+                "status": "in.(pending,running)",
+                "or": f'(lease_until.is.null,lease_until.lt."{now}")',
+            },
+            {"status": "running", "lease_owner": self.owner, "lease_until": self._lease_until(), "error": None},
+        )
+        return rows[0] if rows else None
+
+    async def enqueue(self, problem_id: str, testcase_ids: List[str]) -> dict:
+        """Queue a rejudge of these testcases against accepted submissions"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "problem_id": str(problem_id),
+            "testcase_ids": [str(tc_id) for tc_id in testcase_ids],
+            "status": "pending",
+            "cursor": None,
+            "checked": 0,
+            "failed": 0,
+            # user_id lists, kept so the final user_progress update survives restarts
+            "failed_users": [],
+            "passing_users": [],
+            "skipped_users": [],
+            # Submissions whose stored code is missing or unreadable
+            "skipped": [],
+            "error": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+        }
+        await sb_admin.post(TABLE, job)
+        self._wake.set()
+        print(f"Rejudge queued for problem {problem_id}: {len(testcase_ids)} testcases")
+        return job
+
+    async def list_jobs(self) -> List[dict]:
+        return await sb_admin.get(TABLE, {"order": "created_at.asc", **select(*LIST_FIELDS)})
+
+    async def _throttle(self):
+        """
+        Wait before each executor run: one rate-limit token per run, and a
+        free executor slot, so live traffic never queues behind rejudging
+        """
+        rate = settings.REJUDGE_RUNS_PER_SECOND
+        while not await shared_state.take("ratelimit:rejudge", max(rate, 1), rate, 1):
+            await asyncio.sleep(max(1 / rate, 0.1) if rate > 0 else 1)
+        await wait_for_free_slot()
+
+    async def _run_job(self, job: dict):
+        problem_id = job["problem_id"]
+        ids = ",".join(job["testcase_ids"])
+        testcases = await sb_admin.get("testcases", {"id": f"in.({ids})", "select": "*"}) if ids else []
+        if not testcases:
+            job["status"] = "done"
+            return
+
+        problems = await sb_admin.get("problems", {"id": f"eq.{problem_id}", "select": "*"})
+        problem = problems[0] if problems else None
+        languages = await catalog.languages()
+
+        failed_users = set(job["failed_users"])
+        passing_users = set(job["passing_users"])
+        skipped_users = set(job["skipped_users"])
+
+        rows = sb_admin.iter_rows(
+            "submissions",
+            {
+                "problem_id": f"eq.{problem_id}",
+                "passed": "eq.true",
+                **select("id", "user_id", "language_slug", "code", "code_hash", "score"),
+            },
+            page_size=settings.REJUDGE_BATCH_SIZE,
+            start_after=job["cursor"],
+        )
+
+        batch = []
+        async for sub in rows:
+            batch.append(sub)
+            if len(batch) >= settings.REJUDGE_BATCH_SIZE:
+                await self._run_batch(job, batch, testcases, problem, languages, failed_users, passing_users, skipped_users)
+                batch = []
+        if batch:
+            await self._run_batch(job, batch, testcases, problem, languages, failed_users, passing_users, skipped_users)
+
+        # Users whose every accepted submission failed are no longer solved
+        unsolved = sorted(failed_users - passing_users - skipped_users)
+        if unsolved:
+            await sb_admin.patch(
+                "user_progress",
+                {"problem_id": f"eq.{problem_id}", "user_id": f"in.({','.join(unsolved)})"},
+                {"solved": False},
+            )
+        rescored = passing_users and any(tc.get("points") for tc in testcases)
+        if unsolved or rescored:
+            await leaderboard.reconcile()
+
+        job["status"] = "done"
+
+    async def _run_batch(self, job, batch, testcases, problem, languages, failed_users, passing_users, skipped_users):
+        results_to_insert = []
+        failed_by_verdict: Dict[str, List[str]] = {}
+        # New score -> passing submission ids, and user_id -> best new score
+        passing_by_score: Dict[int, List[str]] = {}
+        best_by_user: Dict[str, int] = {}
+        # Last submission fully handled; the checkpoint never goes past it
+        done_id = None
+        retry = None
+
+        for sub in batch:
+            lang_config = languages.get(sub["language_slug"])
+            if not lang_config:
+                done_id = sub["id"]
+                continue
+            try:
+                code = await submission_code(sub)
+            except ContentMissing as e:
+                print(f"Warning: Rejudge {job['id']} skipped submission {sub['id']}: {e}")
+                job["skipped"].append(str(sub["id"]))
+                skipped_users.add(str(sub["user_id"]))
+                done_id = sub["id"]
+                continue
+
+            # One run at a time, each throttled
+            judged = await judge(
+                lang_config["executor_key"],
+                code,
+                testcases,
+                fail_fast=True,
+                limits=execution_limits(problem, lang_config),
+                concurrency=1,
+                before_run=self._throttle,
+            )
+
+            # No verdict from the executor: stop here and retry this submission later
+            if not judged["results"] or any(res["verdict"] == Verdict.IE.value for res in judged["results"]):
+                retry = f"Executor failed on submission {sub['id']}"
+                break
+
+            now = datetime.now(timezone.utc).isoformat()
+            output_fields = await stored_fields("actual_output", [res["output"][:1000] for res in judged["results"]])
+            for res, output_field in zip(judged["results"], output_fields):
+                results_to_insert.append({
+                    "id": str(uuid.uuid4()),
+                    "submission_id": sub["id"],
+                    "testcase_id": res["testcase_id"],
+                    "passed": res["passed"],
+                    "verdict": res["verdict"],
+                    **output_field,
+                    "runtime_ms": res["runtime_ms"],
+                    "memory_kb": res["memory_kb"],
+                    "created_at": now,
+                })
+
+            job["checked"] += 1
+            if judged["all_passed"]:
+                passing_users.add(str(sub["user_id"]))
+                if judged["total_score"]:
+                    score = (sub.get("score") or 0) + judged["total_score"]
+                    passing_by_score.setdefault(score, []).append(str(sub["id"]))
+                    user_id = str(sub["user_id"])
+                    best_by_user[user_id] = max(best_by_user.get(user_id, 0), score)
+            else:
+                job["failed"] += 1
+                failed_users.add(str(sub["user_id"]))
+                failed_by_verdict.setdefault(judged["verdict"], []).append(str(sub["id"]))
+            done_id = sub["id"]
+
+        if results_to_insert:
+            await sb_admin.post("submission_results", results_to_insert)
+        for verdict, sub_ids in failed_by_verdict.items():
+            await sb_admin.patch(
+                "submissions",
+                {"id": f"in.({','.join(sub_ids)})"},
+                {"passed": False, "verdict": verdict},
+            )
+        for score, sub_ids in passing_by_score.items():
+            await sb_admin.patch("submissions", {"id": f"in.({','.join(sub_ids)})"}, {"score": score})
+        users_by_best: Dict[int, List[str]] = {}
+        for user_id, score in best_by_user.items():
+            users_by_best.setdefault(score, []).append(user_id)
+        for score, user_ids in users_by_best.items():
+            # Only ever raises best_score
+            await sb_admin.patch(
+                "user_progress",
+                {
+                    "problem_id": f"eq.{job['problem_id']}",
+                    "user_id": f"in.({','.join(sorted(user_ids))})",
+                    "best_score": f"lt.{score}",
+                },
+                {"best_score": score},
+            )
+
+        # Checkpoint
+        if done_id is not None:
+            job["cursor"] = done_id
+        job["failed_users"] = sorted(failed_users)
+        job["passing_users"] = sorted(passing_users)
+        job["skipped_users"] = sorted(skipped_users)
+        await self._save(job)
+        print(f"Rejudge {job['id']}: {job['checked']} checked, {job['failed']} now failing")
+        if retry:
+            raise RetryLater(retry)
+
+    async def run_pending(self):
+        jobs = await sb_admin.get(
+            TABLE, {"status": "in.(pending,running)", "order": "created_at.asc", **select("id")}
+        )
+        for row in jobs:
+            job = await self._claim(row["id"])
+            if job is None:
+                continue  # another worker has it
+
+            try:
+                await self._run_job(job)
+            except LeaseLost as e:
+                print(f"Warning: {e}")
+                continue
+            except RetryLater as e:
+                # Hold the lease until the retry time so no worker picks it up sooner
+                print(f"Warning: Rejudge {job['id']} paused, retrying in {settings.REJUDGE_RETRY_SECONDS}s: {e}")
+                job["status"] = "pending"
+                job["error"] = str(e)
+                job["lease_until"] = self._lease_until(settings.REJUDGE_RETRY_SECONDS)
+            except Exception as e:
+                print(f"Warning: Rejudge {job['id']} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            if job["status"] != "pending":
+                job["finished_at"] = datetime.now(timezone.utc).isoformat()
+                job["lease_until"] = None
+            try:
+                await self._save(job)
+            except LeaseLost as e:
+                print(f"Warning: {e}")
+                continue
+            print(f"Rejudge {job['id']} {job['status']}")
+
+    async def run_forever(self, poll_seconds: int = 30):
+        """Process jobs as they are queued; also resumes unfinished jobs on startup"""
+        while True:
+            self._wake.clear()
+            try:
+                await self.run_pending()
+            except Exception as e:
+                print(f"Warning: Rejudge worker error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+rejudger = Rejudger()
@@ -0,0 +1,149 @@
+import asyncio
+import gzip
+import json
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies above this are compressed in a thread so the event loop keeps serving
+THREAD_COMPRESS_BYTES = 64 * 1024
+
+
+def _default(obj: Any):
+    """Encode what the JSON libraries can't handle natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes (orjson if installed, else the stdlib)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for large payloads of plain dicts/lists
+    Return it directly from a route (`return FastJSONResponse({...})`) so
+    FastAPI skips jsonable_encoder; the content is serialized in one pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Parse Accept-Encoding into {encoding: q}"""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            encodings[name.lower()] = q
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression of responses above minimum_size
+    Brotli is used when the client prefers it and the brotli package is
+    installed, gzip otherwise. Streamed responses (NDJSON, file downloads)
+    and responses that are already encoded pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope) -> Optional[str]:
+        header = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                header = value.decode("latin-1")
+                break
+        accepted = _accepted_encodings(header)
+        br_q = accepted.get("br", 0) if brotli is not None else 0
+        gzip_q = accepted.get("gzip", accepted.get("*", 0))
+        if br_q > 0 and br_q >= gzip_q:
+            return "br"
+        if gzip_q > 0:
+            return "gzip"
+        return None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streaming
+
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know the body size
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+
+            headers = start_message.setdefault("headers", [])
+            body = message.get("body", b"")
+            already_encoded = any(key.lower() == b"content-encoding" for key, _ in headers)
+
+            if message.get("more_body", False) or already_encoded or len(body) < self.minimum_size:
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) > THREAD_COMPRESS_BYTES:
+                compressed = await asyncio.to_thread(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+            headers[:] = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
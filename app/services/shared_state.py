@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# Longest request or reply line (e.g. a published leaderboard snapshot)
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class MemoryStore:
+    """
+    Bounded in-memory key/value store with TTLs
+    Backs the shared state server, and is the in-process fallback when no
+    server is configured. Least recently used keys are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+
+    def _get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        return self._get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        self._put(key, value, ttl)
+        return True
+
+    def delete(self, key: str) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        value = (self._get(key) or 0) + amount
+        self._put(key, value)
+        return value
+
+    def hincr(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self._get(key) or {}
+        fields[field] = fields.get(field, 0) + amount
+        self._put(key, fields)
+        return fields[field]
+
+    def hgetall(self, key: str) -> Dict[str, Any]:
+        return dict(self._get(key) or {})
+
+    def mget(self, keys: list) -> list:
+        return [self._get(key) for key in keys]
+
+    def mset(self, items: dict, ttl: Optional[float] = None) -> bool:
+        for key, value in items.items():
+            self._put(key, value, ttl)
+        return True
+
+    def keys(self, prefix: str) -> list:
+        return [key for key in list(self._data) if key.startswith(prefix) and self._get(key) is not None]
+
+    def take(self, key: str, capacity: float, refill_per_second: float, tokens: float = 1) -> bool:
+        """Token bucket: take tokens if available"""
+        now = time.monotonic()
+        level, updated = self._get(key) or (capacity, now)
+        level = min(capacity, level + (now - updated) * refill_per_second)
+        allowed = level >= tokens
+        if allowed:
+            level -= tokens
+        self._put(key, (level, now))
+        return allowed
+
+    def _leases(self, key: str) -> Dict[str, float]:
+        now = time.monotonic()
+        return {holder: expires for holder, expires in (self._get(key) or {}).items() if expires > now}
+
+    def acquire(self, key: str, limit: int, holder: str, ttl: float) -> bool:
+        """Counting semaphore: lease one of limit slots to holder for ttl seconds"""
+        leases = self._leases(key)
+        allowed = holder in leases or len(leases) < limit
+        if allowed:
+            leases[holder] = time.monotonic() + ttl
+        self._put(key, leases)
+        return allowed
+
+    def release(self, key: str, holder: str) -> bool:
+        leases = self._leases(key)
+        released = leases.pop(holder, None) is not None
+        self._put(key, leases)
+        return released
+
+    def holders(self, key: str) -> int:
+        return len(self._leases(key))
+
+    OPS = (
+        "get", "set", "delete", "incr", "hincr", "hgetall", "mget", "mset", "keys", "take",
+        "acquire", "release", "holders",
+    )
+
+    def apply(self, op: str, args: list) -> Any:
+        if op not in self.OPS:
+            raise ValueError(f"Unknown op: {op}")
+        return getattr(self, op)(*args)
+
+
+async def _handle_client(store: MemoryStore, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve newline-delimited JSON requests: {"id": ..., "op": ..., "args": [...]}"""
+    try:
+        while line := await reader.readline():
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                response = {"id": request_id, "result": store.apply(request["op"], request.get("args", []))}
+            except Exception as e:
+                response = {"id": request_id, "error": str(e)}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def start_server(socket_path: str) -> threading.Thread:
+    """
+    Run the shared state server on a unix socket in a background thread
+    Called by run.py in the parent process before uvicorn forks workers.
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    ready = threading.Event()
+
+    def serve():
+        store = MemoryStore(settings.SHARED_STATE_MAX_ENTRIES)
+
+        async def main():
+            server = await asyncio.start_unix_server(
+                lambda r, w: _handle_client(store, r, w), path=socket_path, limit=STREAM_LIMIT
+            )
+            ready.set()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(main())
+
+    thread = threading.Thread(target=serve, name="shared-state", daemon=True)
+    thread.start()
+    ready.wait(timeout=5)
+    return thread
+
+
+class SharedState:
+    """
+    Client for state shared by all workers (caches, counters, rate limits)
+    Talks to the shared state server when SHARED_STATE_SOCKET is set;
+    otherwise, or if the server is unreachable, uses an in-process store.
+    """
+
+    def __init__(self, socket_path: str = ""):
+        self.socket_path = socket_path
+        self.local = MemoryStore(settings.SHARED_STATE_MAX_ENTRIES)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._ids = itertools.count(1)
+        self._warned = False
+
+    def _drop_connection(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _exchange(self, request: dict) -> Optional[dict]:
+        """
+        One request/reply round trip on the worker's connection
+        Replies must carry the request's id; anything else means the
+        connection is out of step, so it is dropped rather than reused.
+        Returns None if the server is unavailable.
+        """
+        async with self._lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path, limit=STREAM_LIMIT)
+                self._writer.write(json.dumps(request).encode() + b"\n")
+                await self._writer.drain()
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionError("Shared state server closed the connection")
+                response = json.loads(line)
+                if response.get("id") != request["id"]:
+                    raise ConnectionError(f"Shared state reply for request {response.get('id')}, expected {request['id']}")
+                return response
+            except BaseException as e:
+                # Never leave a half-finished exchange on the connection
+                self._drop_connection()
+                if not isinstance(e, (OSError, ValueError)):
+                    raise
+                if not self._warned:
+                    print(f"Warning: Shared state unavailable, using in-process fallback: {e}")
+                    self._warned = True
+                return None
+
+    async def _call(self, op: str, *args) -> Any:
+        if not self.socket_path:
+            return self.local.apply(op, list(args))
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Shielded so a cancelled caller can't abandon the round trip midway
+        request = {"id": next(self._ids), "op": op, "args": list(args)}
+        response = await asyncio.shield(self._exchange(request))
+        if response is None:
+            return self.local.apply(op, list(args))
+
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    async def get(self, key: str) -> Any:
+        return await self._call("get", key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return await self._call("set", key, value, ttl)
+
+    async def delete(self, key: str) -> bool:
+        return await self._call("delete", key)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return await self._call("incr", key, amount)
+
+    async def hincr(self, key: str, field: str, amount: int = 1) -> int:
+        return await self._call("hincr", key, field, amount)
+
+    async def hgetall(self, key: str) -> Dict[str, Any]:
+        return await self._call("hgetall", key)
+
+    async def mget(self, keys: list) -> list:
+        """Get several keys in one round trip"""
+        return await self._call("mget", list(keys))
+
+    async def mset(self, items: dict, ttl: Optional[float] = None) -> bool:
+        """Set several keys in one round trip"""
+        return await self._call("mset", items, ttl)
+
+    async def keys(self, prefix: str) -> list:
+        return await self._call("keys", prefix)
+
+    async def take(self, key: str, capacity: float, refill_per_second: float, tokens: float = 1) -> bool:
+        return await self._call("take", key, capacity, refill_per_second, tokens)
+
+    async def acquire(self, key: str, limit: int, holder: str, ttl: float) -> bool:
+        return await self._call("acquire", key, limit, holder, ttl)
+
+    async def release(self, key: str, holder: str) -> bool:
+        return await self._call("release", key, holder)
+
+    async def holders(self, key: str) -> int:
+        return await self._call("holders", key)
+
+
+shared_state = SharedState(settings.SHARED_STATE_SOCKET)
+
+
+class SharedSemaphore:
+    """
+    Counting semaphore shared by all workers
+    Each slot is a lease in shared state that expires after ttl seconds,
+    so a worker that dies holding slots can't keep them. A local semaphore
+    of the same size stops one worker polling for more slots than exist.
+    """
+
+    def __init__(self, key: str, limit: int, ttl: float, poll_seconds: float = 0.05):
+        self.key = key
+        self.limit = limit
+        self.ttl = ttl
+        self.poll_seconds = poll_seconds
+        self._local = asyncio.Semaphore(limit)
+
+    async def locked(self) -> bool:
+        """True if no slot is free right now, in any worker"""
+        return self._local.locked() or await shared_state.holders(self.key) >= self.limit
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._local:
+            holder = f"{os.getpid()}:{uuid.uuid4().hex}"
+            delay = self.poll_seconds
+            try:
+                while not await shared_state.acquire(self.key, self.limit, holder, self.ttl):
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.5)
+                yield
+            finally:
+                # Also covers a lease granted just as the caller was cancelled
+                await shared_state.release(self.key, holder)
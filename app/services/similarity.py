@@ -0,0 +1,219 @@
+import asyncio
+import random
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.supabase import SupabaseClient, select
+from app.services.content_store import ContentMissing, submission_code
+
+sb_admin = SupabaseClient(admin=True)
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5
+_PRIME = (1 << 61) - 1
+
+# Fixed seed so signatures are stable across restarts and workers
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/|#[^\n]*", re.S)
+_TOKEN = re.compile(r"[A-Za-z_]\w*|\d+|\S")
+
+# Identifiers are normalised so renaming variables doesn't hide a copy
+KEYWORDS = {
+    "if", "else", "elif", "for", "while", "do", "return", "break", "continue",
+    "def", "class", "import", "from", "in", "not", "and", "or", "is", "lambda",
+    "int", "long", "float", "double", "char", "bool", "void", "string", "auto",
+    "const", "static", "public", "private", "new", "let", "var", "function",
+    "fn", "mut", "struct", "switch", "case", "true", "false", "True", "False",
+    "None", "null", "nullptr", "print", "input", "range", "len", "cin", "cout",
+    "vector", "map", "set", "sort", "std", "include", "using", "namespace",
+}
+
+
+def tokenize(code: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(_COMMENT.sub(" ", code)):
+        if (token[0].isalpha() or token[0] == "_") and token not in KEYWORDS:
+            tokens.append("ID")
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def minhash(code: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature over token shingles (None if the code is empty)"""
+    tokens = tokenize(code)
+    if not tokens:
+        return None
+
+    size = min(SHINGLE_SIZE, len(tokens))
+    shingles = {
+        zlib.crc32(" ".join(tokens[i:i + size]).encode())
+        for i in range(len(tokens) - size + 1)
+    }
+
+    return tuple(
+        min((a * s + b) % _PRIME for s in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERMUTATIONS
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures for one (problem, language)"""
+
+    def __init__(self):
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self.owners: Dict[str, str] = {}
+        self.buckets: List[Dict[int, Set[str]]] = [{} for _ in range(BANDS)]
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]):
+        for band in range(BANDS):
+            start = band * ROWS_PER_BAND
+            yield band, hash(signature[start:start + ROWS_PER_BAND])
+
+    def add(self, submission_id: str, user_id: str, signature: Tuple[int, ...]):
+        if submission_id in self.signatures:
+            return
+        self.signatures[submission_id] = signature
+        self.owners[submission_id] = user_id
+        for band, key in self._bands(signature):
+            self.buckets[band].setdefault(key, set()).add(submission_id)
+
+    def query(self, signature: Tuple[int, ...], k: int, exclude_user: Optional[str] = None, exclude_id: Optional[str] = None) -> List[dict]:
+        """Top-k most similar submissions among those sharing an LSH band"""
+        candidates: Set[str] = set()
+        for band, key in self._bands(signature):
+            candidates |= self.buckets[band].get(key, set())
+        candidates.discard(exclude_id)
+
+        scored = [
+            {
+                "submission_id": sub_id,
+                "user_id": self.owners[sub_id],
+                "similarity": round(estimate_similarity(signature, self.signatures[sub_id]), 4),
+            }
+            for sub_id in candidates
+            if exclude_user is None or self.owners[sub_id] != exclude_user
+        ]
+        scored.sort(key=lambda item: -item["similarity"])
+        return scored[:k]
+
+
+class SimilarityIndex:
+    """
+    LSH indexes of accepted submissions, one per (problem, language)
+    Signatures are computed once, when an accepted submission is stored,
+    and saved on submissions.minhash. Indexes are built lazily from those
+    on first query and rebuilt after SIMILARITY_INDEX_TTL_SECONDS to pick
+    up submissions judged by other workers.
+    """
+
+    def __init__(self):
+        self.indexes: Dict[Tuple[str, str], LSHIndex] = {}
+        self._lock = asyncio.Lock()
+
+    async def add(self, problem_id: str, language: str, submission_id: str, user_id: str, code: str):
+        """Sign a newly accepted submission and add it to the index"""
+        signature = await asyncio.to_thread(minhash, code)
+        if not signature:
+            return
+
+        try:
+            await sb_admin.patch("submissions", {"id": f"eq.{submission_id}"}, {"minhash": list(signature)})
+        except Exception as e:
+            print(f"Warning: Failed to store minhash signature: {e}")
+
+        self.index(problem_id, language, submission_id, user_id, signature)
+
+    def index(self, problem_id: str, language: str, submission_id: str, user_id: str, signature: Tuple[int, ...]):
+        """Add a signature already stored on its submission row (if the index is loaded)"""
+        index = self.indexes.get((str(problem_id), language))
+        if index is not None:
+            index.add(str(submission_id), str(user_id), signature)
+
+    async def _ensure(self, problem_id: str, language: str) -> LSHIndex:
+        key = (problem_id, language)
+        async with self._lock:
+            index = self.indexes.get(key)
+            if index and time.monotonic() - index.built_at < settings.SIMILARITY_INDEX_TTL_SECONDS:
+                return index
+
+            index = LSHIndex()
+            params = {
+                "problem_id": f"eq.{problem_id}",
+                "language_slug": f"eq.{language}",
+                "passed": "eq.true",
+            }
+
+            async for row in sb_admin.iter_rows(
+                "submissions",
+                {**params, "minhash": "not.is.null", **select("id", "user_id", "minhash")},
+            ):
+                index.add(str(row["id"]), str(row["user_id"]), tuple(row["minhash"]))
+
+            # Older submissions stored before signatures existed; their
+            # signatures are written back so the next rebuild can skip them
+            skipped = 0
+            async for row in sb_admin.iter_rows(
+                "submissions",
+                {**params, "minhash": "is.null", **select("id", "user_id", "code", "code_hash")},
+                page_size=200,
+            ):
+                try:
+                    code = await submission_code(row)
+                except ContentMissing as e:
+                    print(f"Warning: Similarity index skipped submission {row['id']}: {e}")
+                    skipped += 1
+                    continue
+                signature = await asyncio.to_thread(minhash, code)
+                if signature:
+                    index.add(str(row["id"]), str(row["user_id"]), signature)
+                    try:
+                        await sb_admin.patch("submissions", {"id": f"eq.{row['id']}"}, {"minhash": list(signature)})
+                    except Exception as e:
+                        print(f"Warning: Failed to store minhash for submission {row['id']}: {e}")
+
+            self.indexes[key] = index
+            print(
+                f"✓ Similarity index built for {problem_id}/{language}: {len(index.signatures)} submissions"
+                + (f" ({skipped} skipped, code unreadable)" if skipped else "")
+            )
+            return index
+
+    async def similar(self, submission: dict, k: int = 10, include_same_user: bool = False) -> List[dict]:
+        """Find the top-k accepted submissions most similar to this one"""
+        index = await self._ensure(str(submission["problem_id"]), submission["language_slug"])
+
+        sub_id = str(submission["id"])
+        signature = index.signatures.get(sub_id)
+        if signature is None and submission.get("minhash"):
+            signature = tuple(submission["minhash"])
+        if signature is None:
+            signature = await asyncio.to_thread(minhash, await submission_code(submission))
+        if signature is None:
+            return []
+
+        return index.query(
+            signature,
+            k,
+            exclude_user=None if include_same_user else str(submission["user_id"]),
+            exclude_id=sub_id,
+        )
+
+
+similarity_index = SimilarityIndex()
@@ -1,8 +1,15 @@
 import httpx
 from app.config import settings
-from typing import Optional
+from app.services.profiler import span
+from app.services.http_clients import http_client
+from typing import AsyncIterator, Optional
 import json
 
+
+def select(*columns: str) -> dict:
+    """Build a column projection, e.g. select("id", "passed") -> {"select": "id,passed"}"""
+    return {"select": ",".join(columns)}
+
 class SupabaseClient:
     def __init__(self, admin: bool = False):
         key = settings.SUPABASE_SERVICE_ROLE_KEY if admin else settings.SUPABASE_ANON_KEY
@@ -17,82 +24,162 @@ class SupabaseClient:
 
     async def get(self, table: str, params: Optional[dict] = None):
         """Fetch records from a table"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_client("supabase")
+        with span(f"supabase.get {table}"):
             res = await client.get(
                 f"{self.base_url}/{table}",
                 headers=self.headers,
                 params=params or {},
             )
+        res.raise_for_status()
+        return res.json()
+
+    async def iter_rows(
+        self,
+        table: str,
+        params: Optional[dict] = None,
+        page_size: int = 1000,
+        key: Optional[str] = "id",
+        start_after: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream records from a table one page at a time
+        Uses keyset pagination on `key` (which must be unique and sortable);
+        start_after resumes after a previously seen key value.
+        Pass key=None to page with limit/offset instead; include an "order"
+        param in that case so pages are stable.
+        """
+        params = dict(params or {})
+        if key and key in params:
+            raise ValueError(f"Cannot filter on keyset column '{key}' while paging by it")
+
+        if key:
+            params["order"] = f"{key}.asc"
+            if "select" in params and params["select"] != "*":
+                columns = params["select"].split(",")
+                if key not in columns:
+                    params["select"] = ",".join(columns + [key])
+
+        last_key = start_after if key else None
+        offset = 0
+
+        client = http_client("supabase")
+        while True:
+            page_params = {**params, "limit": str(page_size)}
+            if key and last_key is not None:
+                page_params[key] = f"gt.{last_key}"
+            elif not key:
+                page_params["offset"] = str(offset)
+
+            with span(f"supabase.page {table}"):
+                res = await client.get(
+                    f"{self.base_url}/{table}",
+                    headers=self.headers,
+                    params=page_params,
+                )
             res.raise_for_status()
-            return res.json()
+            rows = res.json()
+
+            for row in rows:
+                yield row
+
+            if len(rows) < page_size:
+                return
+
+            if key:
+                last_key = rows[-1][key]
+            offset += len(rows)
+
+    async def count(self, table: str, params: Optional[dict] = None) -> int:
+        """Count matching records without fetching them"""
+        headers = {**self.headers, "Prefer": "count=exact"}
+
+        client = http_client("supabase")
+        with span(f"supabase.count {table}"):
+            res = await client.head(
+                f"{self.base_url}/{table}",
+                headers=headers,
+                params=params or {},
+            )
+        res.raise_for_status()
+
+        # Content-Range looks like "0-24/3573" or "*/0"
+        content_range = res.headers.get("content-range", "*/0")
+        return int(content_range.rsplit("/", 1)[-1])
 
     async def post(self, table: str, data: dict | list):
         """
         Insert record(s) into a table
         Returns the inserted data
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
+        client = http_client("supabase")
+        try:
+            with span(f"supabase.post {table}"):
                 res = await client.post(
                     f"{self.base_url}/{table}",
                     headers=self.headers,
                     json=data,
                 )
                 
-                if res.status_code == 409:
-                    # Get detailed error
-                    error_detail = res.text
-                    print(f"409 Conflict on {table}")
-                    print(f"Data attempted: {json.dumps(data, indent=2, default=str)}")
-                    print(f"Error detail: {error_detail}")
-                    raise httpx.HTTPError(f"Conflict inserting into {table}: {error_detail}")
+            if res.status_code == 409:
+                # Get detailed error
+                error_detail = res.text
+                print(f"409 Conflict on {table}")
+                print(f"Data attempted: {json.dumps(data, indent=2, default=str)}")
+                print(f"Error detail: {error_detail}")
+                raise httpx.HTTPError(f"Conflict inserting into {table}: {error_detail}")
                 
-                res.raise_for_status()
-                return res.json()
+            res.raise_for_status()
+            return res.json()
                 
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP Error on {table}: {e}")
-                print(f"Response: {e.response.text}")
-                raise
+        except httpx.HTTPStatusError as e:
+            print(f"HTTP Error on {table}: {e}")
+            print(f"Response: {e.response.text}")
+            raise
 
     async def patch(self, table: str, params: dict, data: dict):
         """Update record(s) in a table"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_client("supabase")
+        with span(f"supabase.patch {table}"):
             res = await client.patch(
                 f"{self.base_url}/{table}",
                 headers=self.headers,
                 params=params,
                 json=data,
             )
-            res.raise_for_status()
-            return res.json()
+        res.raise_for_status()
+        return res.json()
 
-    async def upsert(self, table: str, data: dict | list):
+    async def upsert(self, table: str, data: dict | list, ignore_duplicates: bool = False):
         """
         Upsert (insert or update) record(s)
         Uses on_conflict to handle duplicates
+        With ignore_duplicates, existing rows are left as they are
         """
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
         headers = {
             **self.headers,
-            "Prefer": "resolution=merge-duplicates,return=representation"
+            "Prefer": f"resolution={resolution},return=representation"
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_client("supabase")
+        with span(f"supabase.upsert {table}"):
             res = await client.post(
                 f"{self.base_url}/{table}",
                 headers=headers,
                 json=data,
             )
-            res.raise_for_status()
-            return res.json()
+        res.raise_for_status()
+        return res.json()
 
     async def delete(self, table: str, params: dict):
         """Delete record(s) from a table"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_client("supabase")
+        with span(f"supabase.delete {table}"):
             res = await client.delete(
                 f"{self.base_url}/{table}",
                 headers=self.headers,
                 params=params,
             )
-            res.raise_for_status()
-            return res.json()
+        res.raise_for_status()
+        return res.json()
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import tempfile
+import zipfile
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+
+class TestCaseImportItem(BaseModel):
+    input: str
+    expected_output: str
+    is_sample: bool = False
+    points: int = 10
+
+
+# (item label, validated testcase or None, error message or None)
+ImportEntry = Tuple[str, Optional[TestCaseImportItem], Optional[str]]
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def limit_size(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass chunks through, raising UploadTooLarge once more than max_bytes have arrived"""
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+def _validate(label: str, raw) -> ImportEntry:
+    """Validate one raw testcase dict"""
+    if not isinstance(raw, dict):
+        return label, None, "Expected a JSON object"
+    try:
+        return label, TestCaseImportItem.model_validate(raw), None
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+        return label, None, errors
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportEntry]:
+    """
+    Parse an NDJSON body incrementally
+    Only the current (incomplete) line is ever kept in memory, as a list of
+    pieces joined once the line ends; each chunk is scanned for newlines
+    once, so long lines split over many chunks stay linear
+    """
+    pieces: List[bytes] = []
+    line_no = 0
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            pieces.append(chunk[start:end])
+            line = b"".join(pieces)
+            pieces.clear()
+            start = end + 1
+
+            line_no += 1
+            entry = _parse_line(line_no, line)
+            if entry:
+                yield entry
+        if start < len(chunk):
+            pieces.append(chunk[start:])
+
+    if pieces:
+        line_no += 1
+        entry = _parse_line(line_no, b"".join(pieces))
+        if entry:
+            yield entry
+
+
+def _parse_line(line_no: int, line: bytes) -> Optional[ImportEntry]:
+    line = line.strip()
+    if not line:
+        return None
+
+    label = f"line {line_no}"
+    try:
+        raw = json.loads(line)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return label, None, f"Invalid JSON: {e}"
+
+    return _validate(label, raw)
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_memory: int) -> tempfile.SpooledTemporaryFile:
+    """
+    Copy an upload into a spooled temp file
+    Zip archives keep their index at the end, so they need a seekable file,
+    but anything above max_memory goes to disk instead of RAM. Writes run
+    in a thread so disk I/O doesn't block the event loop
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_zip(fileobj, max_member_bytes: int) -> Iterator[ImportEntry]:
+    """
+    Read *.in / *.out pairs from a zip archive one member at a time
+    Pairs are matched by path without extension, e.g. tests/01.in + tests/01.out.
+    Files whose name starts with "sample" are imported as sample testcases.
+    Members over max_member_bytes uncompressed are reported, not read
+    (zipfile stops reading a member at its declared size).
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        yield "archive", None, f"Invalid zip file: {e}"
+        return
+
+    with archive:
+        pairs: Dict[str, Dict[str, zipfile.ZipInfo]] = {}
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            stem, ext = os.path.splitext(info.filename)
+            if ext not in (".in", ".out"):
+                continue
+            pairs.setdefault(stem, {})[ext] = info
+
+        for stem in sorted(pairs):
+            members = pairs[stem]
+            if ".in" not in members or ".out" not in members:
+                missing = ".out" if ".in" in members else ".in"
+                yield stem, None, f"Missing {stem}{missing}"
+                continue
+
+            oversized = [info for info in members.values() if info.file_size > max_member_bytes]
+            if oversized:
+                yield stem, None, f"{oversized[0].filename} exceeds {max_member_bytes} bytes"
+                continue
+
+            try:
+                raw = {
+                    "input": archive.read(members[".in"]).decode("utf-8"),
+                    "expected_output": archive.read(members[".out"]).decode("utf-8"),
+                    "is_sample": os.path.basename(stem).lower().startswith("sample"),
+                }
+            except UnicodeDecodeError as e:
+                yield stem, None, f"File is not valid UTF-8: {e}"
+                continue
+            except (zipfile.BadZipFile, OSError) as e:
+                yield stem, None, f"Could not read archive member: {e}"
+                continue
+
+            yield _validate(stem, raw)
+
+
+async def aiter_zip(fileobj, max_member_bytes: int) -> AsyncIterator[ImportEntry]:
+    """iter_zip, with each member read and decompressed in a thread"""
+    entries = iter_zip(fileobj, max_member_bytes)
+    done = object()
+    while True:
+        entry = await asyncio.to_thread(next, entries, done)
+        if entry is done:
+            return
+        yield entry
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Dict, List
+
+from app.services.supabase import SupabaseClient, select
+from app.services.shared_state import shared_state
+
+sb_admin = SupabaseClient(admin=True)
+
+# Marks a counts hash as seeded from the database
+SEEDED_FIELD = "_seeded"
+
+
+class TestcaseFailureStats:
+    """
+    Per-problem failure counts for each testcase
+    Seeded once per problem from submission_results, then kept up to date
+    as submissions are judged. Used to run the most-failed testcases first.
+    Counts live in shared state so every worker orders testcases the same way.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(problem_id: str) -> str:
+        return f"tcfail:{problem_id}"
+
+    async def _load(self, problem_id: str, testcase_ids: List[str]) -> Dict[str, int]:
+        async with self._lock:
+            counts = await shared_state.hgetall(self._key(problem_id))
+            if SEEDED_FIELD in counts:
+                return counts
+
+            counts = {tc_id: 0 for tc_id in testcase_ids}
+            if testcase_ids:
+                async for row in sb_admin.iter_rows(
+                    "submission_results",
+                    {
+                        "testcase_id": f"in.({','.join(testcase_ids)})",
+                        "passed": "eq.false",
+                        **select("testcase_id"),
+                    },
+                ):
+                    tc_id = str(row["testcase_id"])
+                    counts[tc_id] = counts.get(tc_id, 0) + 1
+
+            counts[SEEDED_FIELD] = 1
+            await shared_state.set(self._key(problem_id), counts)
+            return counts
+
+    async def order(self, problem_id: str, testcases: List[dict]) -> List[dict]:
+        """Sort testcases so the historically most-failed ones come first"""
+        try:
+            counts = await self._load(str(problem_id), [str(tc["id"]) for tc in testcases])
+        except Exception as e:
+            print(f"Warning: Could not load testcase stats: {e}")
+            return testcases
+
+        # sorted() is stable, so ties keep their original order
+        return sorted(testcases, key=lambda tc: -counts.get(str(tc["id"]), 0))
+
+    async def record(self, problem_id: str, results: List[dict]):
+        """Count failures from one judged submission"""
+        try:
+            for res in results:
+                if not res["passed"]:
+                    await shared_state.hincr(self._key(str(problem_id)), res["testcase_id"])
+        except Exception as e:
+            print(f"Warning: Could not record testcase stats: {e}")
+
+
+testcase_stats = TestcaseFailureStats()
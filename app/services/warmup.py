@@ -0,0 +1,89 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.catalog import catalog
+from app.services.http_clients import http_client
+from app.services.piston import PISTON_RUNTIMES_URL, run_code
+
+
+class WarmUp:
+    """
+    Startup warm-up, run in the background from the app lifespan
+    Opens connections to Supabase (REST and auth) and Piston, preloads the
+    languages and problem catalogue, and optionally runs a tiny executor
+    smoke test. /ready reports ready once it has finished; a failed step
+    is logged and reported but does not block readiness.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.checks: Dict[str, dict] = {}
+
+    async def _step(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+            self.checks[name] = {"ok": True}
+        except Exception as e:
+            print(f"Warning: Warm-up step {name} failed: {e}")
+            self.checks[name] = {"ok": False, "error": str(e) or type(e).__name__}
+        self.checks[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _open_auth(self):
+        res = await http_client("supabase-auth", timeout=5.0).get(
+            f"{settings.SUPABASE_URL}/auth/v1/health",
+            headers={"apikey": settings.SUPABASE_ANON_KEY},
+        )
+        res.raise_for_status()
+
+    async def _open_piston(self):
+        res = await http_client("piston").get(PISTON_RUNTIMES_URL)
+        res.raise_for_status()
+
+    async def _smoke_test(self):
+        result = await run_code("python", "print(input())", "ok")
+        if result.stdout.strip() != "ok":
+            raise RuntimeError(f"Unexpected executor result: {result.verdict.value} {result.stderr[:200]}")
+
+    async def run(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        print("Warming up...")
+
+        steps = [
+            self._step("languages", catalog.languages()),
+            self._step("problems", catalog.problems()),
+            self._step("auth", self._open_auth()),
+            self._step("piston", self._open_piston()),
+        ]
+        if settings.WARMUP_EXECUTOR_SMOKE_TEST:
+            steps.append(self._step("executor", self._smoke_test()))
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*steps), timeout=settings.WARMUP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"Warning: Warm-up timed out after {settings.WARMUP_TIMEOUT_SECONDS}s")
+            self.checks["timeout"] = {"ok": False, "error": f"Timed out after {settings.WARMUP_TIMEOUT_SECONDS}s"}
+
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        self.ready = True
+        failed = [name for name, check in self.checks.items() if not check["ok"]]
+        if failed:
+            print(f"✓ Warm-up complete (failed: {', '.join(failed)})")
+        else:
+            print("✓ Warm-up complete")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "checks": self.checks,
+        }
+
+
+warmup = WarmUp()
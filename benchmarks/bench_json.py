@@ -0,0 +1,152 @@
+"""
+Benchmark JSON serialization and compression of large responses
+Compares FastAPI's default path (jsonable_encoder + stdlib json) with
+FastJSONResponse, and the bytes on the wire raw / gzip / brotli, for
+payloads shaped like list_problems, get_problem_testcases and /submit.
+
+Run from the repository root:
+    python -m benchmarks.bench_json [--problems 2000] [--testcases 200] [--repeat 20]
+"""
+import argparse
+import gzip
+import json
+import random
+import string
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from app.services.responses import FastJSONResponse, brotli, orjson
+
+TAGS = ["array", "dp", "graph", "greedy", "math", "string", "tree", "sorting", "binary-search", "hashing"]
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(n))
+
+
+def _numbers(rng: random.Random, n: int) -> str:
+    return " ".join(str(rng.randint(-10**9, 10**9)) for _ in range(n))
+
+
+def problem_list(rng: random.Random, n: int) -> dict:
+    """list_problems with user progress merged in"""
+    return {"problems": [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": _words(rng, 4).title(),
+            "slug": _words(rng, 4).replace(" ", "-"),
+            "difficulty": rng.choice(["easy", "medium", "hard"]),
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "solved": rng.random() < 0.3,
+            "best_score": rng.choice([0, 50, 100]),
+            "attempts": rng.randint(0, 12),
+        }
+        for _ in range(n)
+    ]}
+
+
+def testcase_list(rng: random.Random, n: int) -> dict:
+    """get_problem_testcases: inputs/outputs of a few KB each"""
+    problem_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    return {"testcases": [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "problem_id": problem_id,
+            "input": _numbers(rng, rng.randint(50, 500)),
+            "expected_output": _numbers(rng, rng.randint(1, 50)),
+            "is_sample": i < 3,
+            "points": 10,
+            "created_at": "2025-01-01T00:00:00+00:00",
+        }
+        for i in range(n)
+    ]}
+
+
+def submit_result(rng: random.Random, n: int) -> dict:
+    """/submit: one result (with actual_output) per testcase"""
+    return {
+        "passed": False,
+        "verdict": "WA",
+        "score": 10 * (n - 1),
+        "submission_id": str(uuid.uuid4()),
+        "total_tests": n,
+        "passed_tests": n - 1,
+        "skipped_tests": 0,
+        "runtime_ms": 120,
+        "memory_kb": 20480,
+        "runtime_beats": 63.5,
+        "memory_beats": 41.2,
+        "results": [
+            {
+                "testcase_id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "passed": i != 0,
+                "verdict": "AC" if i else "WA",
+                "actual_output": _numbers(rng, rng.randint(1, 100))[:1000],
+                "runtime_ms": rng.randint(5, 120),
+                "memory_kb": rng.randint(8000, 20480),
+            }
+            for i in range(n)
+        ],
+    }
+
+
+def default_render(content) -> bytes:
+    """What FastAPI does for a returned dict with the default JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    """Median process CPU time of one call, in ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        times.append((time.process_time() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def run(name: str, content: dict, repeat: int):
+    body = FastJSONResponse(content).body
+    default_ms = cpu_ms(lambda: default_render(content), repeat)
+    fast_ms = cpu_ms(lambda: FastJSONResponse(content), repeat)
+
+    gz = gzip.compress(body, compresslevel=6)
+    gzip_ms = cpu_ms(lambda: gzip.compress(body, compresslevel=6), repeat)
+
+    print(f"\n{name}")
+    print(f"  serialize  default {default_ms:8.2f} ms   fast {fast_ms:8.2f} ms   ({default_ms / max(fast_ms, 1e-6):.1f}x)")
+    print(f"  wire       raw {len(body):>10,} B   gzip {len(gz):>10,} B ({gzip_ms:.2f} ms)", end="")
+    if brotli is not None:
+        br = brotli.compress(body, quality=4)
+        br_ms = cpu_ms(lambda: brotli.compress(body, quality=4), repeat)
+        print(f"   br {len(br):>10,} B ({br_ms:.2f} ms)")
+    else:
+        print("   br (brotli not installed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--problems", type=int, default=2000)
+    parser.add_argument("--testcases", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"JSON backend: {'orjson' if orjson is not None else 'stdlib json'}")
+    run(f"list_problems ({args.problems} problems)", problem_list(rng, args.problems), args.repeat)
+    run(f"get_problem_testcases ({args.testcases} testcases)", testcase_list(rng, args.testcases), args.repeat)
+    run(f"/submit ({args.testcases} results)", submit_result(rng, args.testcases), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
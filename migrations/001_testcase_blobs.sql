@@ -0,0 +1,13 @@
+-- Large testcase data in content-addressed blobs
+-- Run before deploying; the app writes these columns on every testcase insert.
+-- A testcase stored as a blob has "" in input / expected_output and the
+-- sha256 of the text in input_hash / expected_output_hash.
+
+alter table testcases
+    add column if not exists input_hash text,
+    add column if not exists expected_output_hash text;
+
+-- Private bucket for the blobs (BLOB_STORAGE_BUCKET); only the service role uses it
+insert into storage.buckets (id, name, public)
+values ('testcase-blobs', 'testcase-blobs', false)
+on conflict (id) do nothing;
@@ -0,0 +1,5 @@
+-- Per-problem fail-fast override
+-- Run before deploying. Null means the JUDGE_FAIL_FAST default applies.
+
+alter table problems
+    add column if not exists fail_fast boolean;
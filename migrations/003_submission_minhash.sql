@@ -0,0 +1,11 @@
+-- MinHash signatures of accepted submissions, for similarity queries
+-- Run before deploying; accepted submissions are written with a signature.
+-- Rows without one get it on the next similarity index rebuild.
+
+alter table submissions
+    add column if not exists minhash bigint[];
+
+-- Index rebuilds and percentile seeding read accepted submissions per problem and language
+create index if not exists submissions_problem_language_passed_idx
+    on submissions (problem_id, language_slug)
+    where passed;
@@ -0,0 +1,18 @@
+-- Structured verdicts and per-problem / per-language limits
+-- Run before deploying; every submission insert writes verdict.
+-- Null limits fall back to DEFAULT_TIME_LIMIT_MS / DEFAULT_MEMORY_LIMIT_KB,
+-- a null multiplier to 1 and a null overhead to 0.
+
+alter table submissions
+    add column if not exists verdict text;
+
+alter table submission_results
+    add column if not exists verdict text;
+
+alter table problems
+    add column if not exists time_limit_ms integer,
+    add column if not exists memory_limit_kb integer;
+
+alter table languages
+    add column if not exists time_multiplier real,
+    add column if not exists memory_overhead_kb integer;
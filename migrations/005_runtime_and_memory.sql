@@ -0,0 +1,10 @@
+-- Executor-reported runtime and peak memory
+-- Run before deploying; submission inserts write these columns.
+-- submission_results.runtime_ms already exists.
+
+alter table submissions
+    add column if not exists runtime_ms integer,
+    add column if not exists memory_kb integer;
+
+alter table submission_results
+    add column if not exists memory_kb integer;
@@ -0,0 +1,29 @@
+-- Background rejudge jobs, shared by every instance and kept across redeploys
+-- Run before deploying; adding testcases queues a job here.
+-- A worker owns a running job while lease_until is in the future; a job paused
+-- after an executor failure (IE) is held until lease_until, then retried.
+
+create table if not exists rejudge_jobs (
+    id uuid primary key,
+    problem_id text not null,
+    testcase_ids jsonb not null,
+    status text not null default 'pending',
+    cursor text,
+    checked integer not null default 0,
+    failed integer not null default 0,
+    failed_users jsonb not null default '[]',
+    passing_users jsonb not null default '[]',
+    skipped_users jsonb not null default '[]',
+    skipped jsonb not null default '[]',
+    error text,
+    lease_owner text,
+    lease_until timestamptz,
+    created_at timestamptz not null default now(),
+    finished_at timestamptz
+);
+
+create index if not exists rejudge_jobs_status_idx
+    on rejudge_jobs (status, created_at);
+
+-- Only the service role reads and writes jobs
+alter table rejudge_jobs enable row level security;
@@ -0,0 +1,19 @@
+-- Deduplicated, compressed submission code and outputs
+-- Run before deploying; submission inserts write code_hash / actual_output_hash.
+-- data is zlib-compressed UTF-8 text, keyed by the sha256 of the text.
+
+create table if not exists content_blobs (
+    hash text primary key,
+    data bytea not null,
+    size integer not null,
+    created_at timestamptz not null default now()
+);
+
+-- Only the service role reads and writes blobs
+alter table content_blobs enable row level security;
+
+alter table submissions
+    add column if not exists code_hash text;
+
+alter table submission_results
+    add column if not exists actual_output_hash text;
@@ -6,8 +6,20 @@ if __name__ == "__main__":
     # Local dev will fallback to 8000.
     port = int(os.environ.get("PORT", "8000"))
 
+    # WEB_CONCURRENCY > 1 runs several worker processes
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+    if workers > 1:
+        # Workers share caches, counters and rate limits through one
+        # state server in this (parent) process. They find it via the env.
+        os.environ.setdefault("SHARED_STATE_SOCKET", f"/tmp/algoverse-state-{port}.sock")
+
+        from app.services.shared_state import start_server
+        start_server(os.environ["SHARED_STATE_SOCKET"])
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
+        workers=workers,
     )
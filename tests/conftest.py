@@ -0,0 +1,143 @@
+import os
+import sys
+
+import pytest
+
+# Run the tests against this checkout without installing it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing under test talks to these, but app.config reads them at import
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_ANON_KEY", "anon")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "service")
+
+
+def _text(value) -> str:
+    """A column value as PostgREST writes it in filters"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _less_than(value, bound: str) -> bool:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value < float(bound)
+    return _text(value) < bound
+
+
+def _matches(row: dict, column: str, condition: str) -> bool:
+    """Check one PostgREST filter (eq, neq, lt, in, is, not.is) against a row"""
+    value = row.get(column)
+    op, _, arg = condition.partition(".")
+    arg = arg.strip('"')
+    if op == "eq":
+        return _text(value) == arg
+    if op == "neq":
+        return _text(value) != arg
+    if op == "lt":
+        return value is not None and _less_than(value, arg)
+    if op == "in":
+        return _text(value) in arg.strip("()").split(",")
+    if op == "is":
+        return _text(value) == arg
+    if op == "not":
+        return not _matches(row, column, arg)
+    raise ValueError(f"FakeSupabase does not understand {column}={condition}")
+
+
+def _any_of(row: dict, alternatives: str) -> bool:
+    """An or=(col.op.value,...) filter"""
+    for alternative in alternatives.strip("()").split(","):
+        column, _, condition = alternative.partition(".")
+        if _matches(row, column, condition):
+            return True
+    return False
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for SupabaseClient
+    tables maps a table name to its rows. Reads apply the PostgREST filters
+    the services use (select/order/limit are ignored); writes change the
+    rows and are recorded in writes as (method, table, params, data), and
+    reads in reads as (table, params).
+    """
+
+    # Upsert conflict columns, where they aren't "id"
+    KEYS = {"content_blobs": ("hash",)}
+
+    def __init__(self, tables=None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.writes = []
+        self.reads = []
+
+    def _select(self, table, params):
+        params = params or {}
+        rows = []
+        for row in self.tables.get(table, []):
+            ok = True
+            for column, condition in params.items():
+                if column in ("select", "order", "limit", "offset"):
+                    continue
+                if column == "or":
+                    ok = _any_of(row, condition)
+                else:
+                    ok = _matches(row, column, condition)
+                if not ok:
+                    break
+            if ok:
+                rows.append(row)
+        return rows
+
+    async def get(self, table, params=None):
+        self.reads.append((table, params))
+        return [dict(row) for row in self._select(table, params)]
+
+    async def iter_rows(self, table, params=None, page_size=1000, start_after=None):
+        self.reads.append((table, params))
+        for row in sorted(self._select(table, params), key=lambda row: str(row.get("id"))):
+            if start_after is None or str(row.get("id")) > str(start_after):
+                yield dict(row)
+
+    async def count(self, table, params=None):
+        self.reads.append((table, params))
+        return len(self._select(table, params))
+
+    async def post(self, table, data):
+        self.writes.append(("post", table, None, data))
+        for row in data if isinstance(data, list) else [data]:
+            self.tables.setdefault(table, []).append(dict(row))
+        return data
+
+    async def upsert(self, table, data, ignore_duplicates=False):
+        self.writes.append(("upsert", table, None, data))
+        key = self.KEYS.get(table, ("id",))
+        rows = self.tables.setdefault(table, [])
+        for row in data if isinstance(data, list) else [data]:
+            existing = next((r for r in rows if all(r.get(col) == row.get(col) for col in key)), None)
+            if existing is None:
+                rows.append(dict(row))
+            elif not ignore_duplicates:
+                existing.update(row)
+        return data
+
+    async def patch(self, table, params, data):
+        self.writes.append(("patch", table, params, data))
+        updated = []
+        for row in self._select(table, params):
+            row.update(data)
+            updated.append(dict(row))
+        return updated
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Build a FakeSupabase and install it as sb_admin in the given modules"""
+    def install(tables=None, *modules):
+        fake = FakeSupabase(tables)
+        for module in modules:
+            monkeypatch.setattr(module, "sb_admin", fake)
+        return fake
+    return install
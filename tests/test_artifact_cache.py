@@ -0,0 +1,99 @@
+import asyncio
+import fcntl
+import os
+import threading
+import time
+
+from app.schemas import ExecutionLimits, ExecutionResult, Verdict
+from app.services import artifact_cache as artifact_cache_module
+from app.services.artifact_cache import ArtifactCache
+from app.services.disk_cache import evict_lru
+
+LIMITS = ExecutionLimits(time_ms=1000, memory_kb=65536)
+
+
+def _cache(tmp_path, max_bytes=10 * 1024 * 1024):
+    cache = ArtifactCache(str(tmp_path / "artifacts"), max_bytes)
+    cache.learn_version("cpp", "10.2.0")
+    return cache
+
+
+def _files(cache):
+    return sorted(name for name in os.listdir(cache.root) if not name.startswith("."))
+
+
+def test_hits_skip_interpreted_languages_and_other_versions(tmp_path):
+    async def main():
+        cache = _cache(tmp_path)
+        result = ExecutionResult(verdict=Verdict.AC, stdout="3\n")
+        await cache.put_run("cpp", "code", "1 2", LIMITS, result)
+        await cache.put_run("python", "code", "1 2", LIMITS, result)
+
+        assert await cache.get("cpp", "code", "1 2", LIMITS) == result
+        assert await cache.get("cpp", "code", "1 3", LIMITS) is None
+        assert await cache.get("python", "code", "1 2", LIMITS) is None
+
+        cache.learn_version("cpp", "11.0.0")
+        assert await cache.get("cpp", "code", "1 2", LIMITS) is None
+
+    asyncio.run(main())
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    async def main():
+        cache = _cache(tmp_path, max_bytes=2000)
+        result = ExecutionResult(verdict=Verdict.AC, stdout="x" * 300)
+        await cache.put_run("cpp", "code", "0", LIMITS, result)
+        first = _files(cache)[0]
+        os.utime(os.path.join(cache.root, first), (0, 0))
+        for i in range(1, 10):
+            await cache.put_run("cpp", "code", str(i), LIMITS, result)
+
+        size = sum(os.path.getsize(os.path.join(cache.root, name)) for name in _files(cache))
+        assert size <= 2000
+        assert first not in _files(cache)
+        assert await cache.get("cpp", "code", "0", LIMITS) is None
+        assert await cache.get("cpp", "code", "9", LIMITS) == result
+
+    asyncio.run(main())
+
+
+def test_eviction_waits_for_the_lock(tmp_path):
+    cache = _cache(tmp_path, max_bytes=100)
+    os.makedirs(cache.root)
+    for i in range(5):
+        with open(os.path.join(cache.root, f"{i}.run"), "w") as f:
+            f.write("x" * 100)
+
+    evicted = []
+    with open(os.path.join(cache.root, ".lock"), "w") as lock:
+        # Another worker is sweeping
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sweeper = threading.Thread(target=lambda: evicted.append(evict_lru(cache.root, cache.max_bytes)))
+        sweeper.start()
+        time.sleep(0.1)
+        assert sweeper.is_alive()
+        assert len(_files(cache)) == 5
+    sweeper.join(timeout=5)
+
+    assert evicted == [5]
+    assert _files(cache) == []
+
+
+def test_a_read_survives_eviction_once_the_file_is_open(tmp_path, monkeypatch):
+    cache = _cache(tmp_path)
+    result = ExecutionResult(verdict=Verdict.CE, stderr="error: expected ';'")
+    asyncio.run(cache.put_compile_error("cpp", "code", result))
+    path = os.path.join(cache.root, _files(cache)[0])
+    real_utime = os.utime
+
+    def evicted_while_reading(target, *args, **kwargs):
+        if os.path.exists(path):
+            os.unlink(path)
+        return real_utime(target, *args, **kwargs)
+
+    monkeypatch.setattr(artifact_cache_module.os, "utime", evicted_while_reading)
+    assert asyncio.run(cache.get("cpp", "code", "", LIMITS)) == result
+
+    # Gone before the open: a miss, not an error
+    assert asyncio.run(cache.get("cpp", "code", "", LIMITS)) is None
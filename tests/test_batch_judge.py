@@ -0,0 +1,102 @@
+import asyncio
+
+from app.schemas import ExecutionResult, Verdict
+from app.services import batch_judge, content_store, testcase_stats
+from app.services import catalog as catalog_module
+from app.services import judge as judge_module
+
+
+TABLES = {
+    "languages": [{"slug": "py", "executor_key": "python"}],
+    "problems": [{"id": "p1"}],
+    "testcases": [
+        {"id": f"t{i}", "problem_id": "p1", "input": str(i), "expected_output": str(i), "points": 10}
+        for i in range(3)
+    ],
+}
+
+
+def _setup(monkeypatch, fake_supabase):
+    fake = fake_supabase(TABLES, batch_judge, content_store, catalog_module, testcase_stats)
+    monkeypatch.setattr(catalog_module.catalog, "_languages", None)
+
+    async def no_reconcile():
+        pass
+
+    async def no_rank(*args):
+        return {"runtime_beats": None, "memory_beats": None}
+
+    monkeypatch.setattr(batch_judge.leaderboard, "reconcile", no_reconcile)
+    monkeypatch.setattr(batch_judge.percentiles, "rank_and_record", no_rank)
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        if code == "boom":
+            raise KeyError("Blob not found")
+        await asyncio.sleep(0.01)
+        return ExecutionResult(verdict=Verdict.AC, stdout=stdin if code == "good" else "x", cpu_ms=1)
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    return fake
+
+
+ENTRIES = [
+    {"user_id": "u1", "problem_id": "p1", "language": "py", "code": "good", "ref": "a"},
+    {"user_id": "u2", "problem_id": "p1", "language": "py", "code": "boom"},
+    {"user_id": "u3", "problem_id": "p1", "language": "py", "code": "bad"},
+    {"user_id": "u4", "problem_id": "p1", "language": "zz", "code": "good"},
+]
+
+
+def test_one_failing_entry_does_not_abort_the_batch(monkeypatch, fake_supabase):
+    fake = _setup(monkeypatch, fake_supabase)
+
+    async def main():
+        lines = []
+        await batch_judge.judge_batch(ENTRIES, lines.append)
+        return lines
+
+    lines = asyncio.run(main())
+    by_index = {line["index"]: line for line in lines if "index" in line}
+    assert by_index[0]["passed"] is True
+    assert "Judging failed" in by_index[1]["error"]
+    assert by_index[2]["verdict"] == "WA"
+    assert by_index[3]["error"] == "Invalid language"
+    assert lines[-1] == {"done": True, "judged": 2, "errors": 2, "failed_writes": 0}
+
+    assert sorted(row["user_id"] for row in fake.tables["submissions"]) == ["u1", "u3"]
+    assert sorted(row["user_id"] for row in fake.tables["user_progress"]) == ["u1", "u3"]
+
+
+def test_batch_finishes_its_writes_without_a_reader(monkeypatch, fake_supabase):
+    fake = _setup(monkeypatch, fake_supabase)
+
+    async def main():
+        queue = batch_judge.start_batch(ENTRIES)
+        await queue.get()  # the client reads one line, then goes away
+        await asyncio.gather(*batch_judge._running)
+
+    asyncio.run(main())
+    tables = [table for _, table, _, _ in fake.writes]
+    assert "submissions" in tables
+    assert "submission_results" in tables
+    assert "user_progress" in tables
+
+
+def test_batch_leaves_an_executor_slot_for_live_traffic(monkeypatch, fake_supabase):
+    _setup(monkeypatch, fake_supabase)
+    monkeypatch.setattr(batch_judge.settings, "BATCH_JUDGE_CONCURRENCY", 8)
+    running = {"now": 0, "peak": 0}
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return ExecutionResult(verdict=Verdict.AC, stdout=stdin, cpu_ms=1)
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    entries = [{"user_id": f"u{i}", "problem_id": "p1", "language": "py", "code": "good"} for i in range(10)]
+    asyncio.run(batch_judge.judge_batch(entries, lambda line: None))
+
+    assert batch_judge.batch_concurrency() == batch_judge.settings.EXECUTOR_CONCURRENCY - 1
+    assert running["peak"] == batch_judge.settings.EXECUTOR_CONCURRENCY - 1
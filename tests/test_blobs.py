@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services import blobs
+from app.services.blobs import BlobStore, LocalBlobBackend
+
+
+def _store(tmp_path, cache_max_bytes=10 * 1024 * 1024):
+    return BlobStore(LocalBlobBackend(str(tmp_path / "blobs")), str(tmp_path / "cache"), cache_max_bytes)
+
+
+def test_round_trip_survives_a_wiped_cache(tmp_path):
+    async def main():
+        store = _store(tmp_path)
+        digest = await store.put("hello\n".encode() * 1000)
+
+        # A fresh instance with an empty cache reads from the backend
+        fresh = BlobStore(store.backend, str(tmp_path / "other-cache"), 10 * 1024 * 1024)
+        assert await fresh.read_text(digest) == "hello\n" * 1000
+
+    asyncio.run(main())
+
+
+def test_missing_blob_raises_key_error(tmp_path):
+    async def main():
+        with pytest.raises(KeyError):
+            await _store(tmp_path).read_text("ab" * 32)
+
+    asyncio.run(main())
+
+
+def test_cache_is_evicted_past_its_limit(tmp_path):
+    async def main():
+        store = _store(tmp_path, cache_max_bytes=3000)
+        digests = [await store.put(bytes([65 + i]) * 1000) for i in range(6)]
+
+        cached = sum(len(files) for _, _, files in os.walk(tmp_path / "cache") if files)
+        assert cached < 6
+
+        # Evicted entries are refilled from the backend
+        assert await store.read_text(digests[0]) == "A" * 1000
+
+    asyncio.run(main())
+
+
+def test_read_refetches_a_file_evicted_after_the_exists_check(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    digest = asyncio.run(store.put(b"x" * 5000))
+    cache_path = blobs._shard(store.cache_dir, digest)
+    real_exists = os.path.exists
+
+    def exists_then_evicted(path):
+        found = real_exists(path)
+        if path == cache_path and found:
+            os.unlink(path)  # another worker's sweep wins the race
+        return found
+
+    monkeypatch.setattr(os.path, "exists", exists_then_evicted)
+    assert asyncio.run(store.read_text(digest)) == "x" * 5000
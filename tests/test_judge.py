@@ -0,0 +1,61 @@
+import asyncio
+
+from app.schemas import ExecutionResult, Verdict
+from app.services import judge as judge_module
+
+
+def _testcases(n):
+    return [{"id": f"t{i}", "input": str(i), "expected_output": str(i), "points": 10} for i in range(n)]
+
+
+def _fake_executor(monkeypatch, wrong=()):
+    state = {"running": 0, "peak": 0, "started": []}
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        state["started"].append(stdin)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            state["running"] -= 1
+        return ExecutionResult(verdict=Verdict.AC, stdout="x" if stdin in wrong else stdin, cpu_ms=1)
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    return state
+
+
+def test_submission_concurrency_is_capped(monkeypatch):
+    state = _fake_executor(monkeypatch)
+    judged = asyncio.run(judge_module.judge("python", "code", _testcases(10), concurrency=2))
+    assert judged["all_passed"]
+    assert judged["passed_count"] == 10
+    assert state["peak"] == 2
+    assert [res["testcase_id"] for res in judged["results"]] == [f"t{i}" for i in range(10)]
+
+
+def test_fail_fast_stops_dispatch(monkeypatch):
+    state = _fake_executor(monkeypatch, wrong={"1"})
+    judged = asyncio.run(judge_module.judge("python", "code", _testcases(10), fail_fast=True, concurrency=1))
+    assert judged["verdict"] == "WA"
+    assert state["started"] == ["0", "1"]
+    assert judged["skipped"] == 8
+
+
+def test_without_fail_fast_every_testcase_runs(monkeypatch):
+    _fake_executor(monkeypatch, wrong={"1"})
+    judged = asyncio.run(judge_module.judge("python", "code", _testcases(5), concurrency=3))
+    assert judged["verdict"] == "WA"
+    assert judged["passed_count"] == 4
+    assert judged["skipped"] == 0
+
+
+def test_before_run_is_awaited_per_testcase(monkeypatch):
+    _fake_executor(monkeypatch)
+    calls = []
+
+    async def before_run():
+        calls.append(1)
+
+    asyncio.run(judge_module.judge("python", "code", _testcases(4), concurrency=1, before_run=before_run))
+    assert len(calls) == 4
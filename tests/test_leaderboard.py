@@ -0,0 +1,77 @@
+import asyncio
+
+from app.services import leaderboard as leaderboard_module
+from app.services.leaderboard import Leaderboard
+from app.services.shared_state import SharedState
+
+
+def test_ranked_by_solved_then_score_then_fewest_attempts():
+    board = Leaderboard()
+    board.record_submission("alice", "p1", True, 100)
+    board.record_submission("bob", "p1", True, 100)
+    board.record_submission("bob", "p2", False, 40)
+    board.record_submission("carol", "p1", False, 0)
+    board.record_submission("carol", "p1", True, 100)
+    board.record_submission("carol", "p2", False, 60)
+
+    assert [entry["user_id"] for entry in board.top()] == ["carol", "bob", "alice"]
+    assert board.rank("alice") == {"rank": 3, "user_id": "alice", "solved": 1, "score": 100, "attempts": 1}
+
+
+def test_resubmitting_a_solved_problem_counts_attempts_only():
+    board = Leaderboard()
+    board.record_submission("alice", "p1", True, 80)
+    board.record_submission("alice", "p1", True, 50)
+    board.record_submission("alice", "p1", True, 100)
+
+    assert board.rank("alice")["solved"] == 1
+    assert board.rank("alice")["score"] == 100
+    assert board.rank("alice")["attempts"] == 3
+    assert board.user_count() == 1
+    assert board.problem_stats("p1") == {
+        "problem_id": "p1", "attempts": 3, "accepted": 3, "solvers": 1, "acceptance_rate": 1.0,
+    }
+
+
+def test_top_pages_through_the_ranking():
+    board = Leaderboard()
+    for i in range(5):
+        board.record_submission(f"u{i}", "p1", True, 10 * i)
+
+    page = board.top(limit=2, offset=1)
+    assert [(entry["rank"], entry["user_id"]) for entry in page] == [(2, "u3"), (3, "u2")]
+    assert board.rank("missing") is None
+
+
+def _scans(fake):
+    return sum(table == "user_progress" for table, _ in fake.reads)
+
+
+def test_one_worker_scans_and_the_others_load_its_snapshot(monkeypatch, fake_supabase):
+    fake = fake_supabase({
+        "user_progress": [{"user_id": "alice", "problem_id": "p1", "solved": True, "best_score": 100, "attempts": 2}],
+        "problems": [{"id": "p1"}, {"id": "p2"}],
+        "submissions": [{"id": "s1", "problem_id": "p1", "passed": False}, {"id": "s2", "problem_id": "p1", "passed": True}],
+    }, leaderboard_module)
+    monkeypatch.setattr(leaderboard_module, "shared_state", SharedState(""))
+
+    async def main():
+        workers = [Leaderboard() for _ in range(3)]
+        last = [0.0] * 3
+        for _ in range(2):
+            for i, board in enumerate(workers):
+                last[i] = await board.sync(f"worker-{i}", 300, last[i])
+
+        assert _scans(fake) == 1
+        for board in workers:
+            assert board.rank("alice") == {"rank": 1, "user_id": "alice", "solved": 1, "score": 100, "attempts": 2}
+            assert board.problem_stats("p1")["acceptance_rate"] == 0.5
+            assert board.problem_stats("p2")["attempts"] == 0
+
+        # A worker that starts later loads the snapshot instead of scanning
+        late = Leaderboard()
+        await late.ensure_loaded()
+        assert _scans(fake) == 1
+        assert late.progress[("alice", "p1")] == {"solved": True, "best_score": 100}
+
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.services import percentiles as percentiles_module
+from app.services.percentiles import SEEDED_FIELD, PercentileTracker, beats, bucket
+from app.services.shared_state import SharedState
+
+
+def _histogram(*values):
+    histogram = {SEEDED_FIELD: 1}
+    for value in values:
+        key = str(bucket(value))
+        histogram[key] = histogram.get(key, 0) + 1
+    return histogram
+
+
+def test_beats_counts_slower_values_and_half_of_ties():
+    histogram = _histogram(10, 100, 100, 1000)
+    assert beats(histogram, 100) == 50.0
+    assert beats(histogram, 1) == 100.0
+    assert beats(histogram, 5000) == 0.0
+
+
+def test_beats_without_data_is_none():
+    assert beats({SEEDED_FIELD: 1}, 10) is None
+
+
+def test_buckets_are_monotonic():
+    values = [0, 1, 2, 10, 100, 1000, 10 ** 6]
+    buckets = [bucket(value) for value in values]
+    assert buckets == sorted(buckets)
+    assert bucket(-5) == bucket(0)
+
+
+def test_seeding_skips_the_submission_being_ranked(monkeypatch, fake_supabase):
+    submission = {"problem_id": "p1", "language_slug": "py", "passed": True}
+    fake_supabase({"submissions": [
+        {**submission, "id": "s1", "runtime_ms": 50, "memory_kb": 1000},
+        {**submission, "id": "s2", "runtime_ms": 150, "memory_kb": 3000},
+    ]}, percentiles_module)
+    monkeypatch.setattr(percentiles_module, "shared_state", SharedState(""))
+
+    # s2 is already in submissions when it is ranked; counted twice it would tie with itself
+    ranks = asyncio.run(PercentileTracker().rank_and_record("p1", "py", "s2", 150, 3000))
+    assert ranks == {"runtime_beats": 0.0, "memory_beats": 0.0}
@@ -0,0 +1,57 @@
+from app.schemas import ExecutionLimits, Verdict
+from app.services.piston import execution_limits, parse_result
+
+LIMITS = ExecutionLimits(time_ms=1000, memory_kb=65536)
+
+
+def run(**stage):
+    return {"run": {"stdout": "", "stderr": "", "code": 0, "signal": None, **stage}}
+
+
+def test_clean_run_is_accepted():
+    result = parse_result(run(stdout="3\n", cpu_time=12, memory=2048 * 1024), LIMITS)
+    assert result.verdict == Verdict.AC
+    assert result.stdout == "3\n"
+    assert result.memory_kb == 2048
+
+
+def test_compile_failure():
+    data = {"compile": {"code": 1, "stderr": "error: expected ';'"}, "run": {}}
+    result = parse_result(data, LIMITS)
+    assert result.verdict == Verdict.CE
+    assert "expected" in result.stderr
+
+
+def test_timeouts():
+    assert parse_result(run(status="TO"), LIMITS).verdict == Verdict.TLE
+    assert parse_result(run(cpu_time=1500), LIMITS).verdict == Verdict.TLE
+    killed = run(code=None, signal="SIGKILL", wall_time=1200)
+    assert parse_result(killed, LIMITS).verdict == Verdict.TLE
+
+
+def test_output_limit_and_internal_error():
+    assert parse_result(run(status="OL"), LIMITS).verdict == Verdict.OLE
+    result = parse_result(run(status="XX", message="sandbox failed"), LIMITS)
+    assert result.verdict == Verdict.IE
+    assert result.stderr == "sandbox failed"
+
+
+def test_crash_near_memory_cap_is_mle():
+    crashed = run(code=137, signal="SIGKILL", wall_time=10, memory=65000 * 1024)
+    assert parse_result(crashed, LIMITS).verdict == Verdict.MLE
+    assert parse_result(run(code=1, memory=1024 * 1024), LIMITS).verdict == Verdict.RE
+
+
+def test_no_memory_cap_never_reports_mle():
+    uncapped = ExecutionLimits(time_ms=1000)
+    crashed = run(code=137, signal="SIGKILL", wall_time=10, memory=900000 * 1024)
+    assert parse_result(crashed, uncapped).verdict == Verdict.RE
+
+
+def test_problems_without_limits_keep_the_old_defaults():
+    limits = execution_limits({}, {"time_multiplier": 2, "memory_overhead_kb": 1024})
+    assert limits.time_ms == 6000
+    assert limits.memory_kb is None
+
+    limits = execution_limits({"time_limit_ms": 1000, "memory_limit_kb": 4096}, {"memory_overhead_kb": 1024})
+    assert (limits.time_ms, limits.memory_kb) == (1000, 5120)
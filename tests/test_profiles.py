@@ -0,0 +1,20 @@
+import asyncio
+
+from app.services import profiles
+
+
+def test_cached_profile_for_another_user_is_ignored(fake_supabase):
+    fake = fake_supabase({"profiles": [{"id": "u1", "role": "admin"}, {"id": "u2", "role": "coder"}]}, profiles)
+
+    async def main():
+        # A corrupted entry under u2's key
+        await profiles.shared_state.set(profiles._key("u2"), {"id": "u1", "role": "admin"})
+        profile = await profiles.get_profile("u2")
+        assert profile == {"id": "u2", "role": "coder"}
+        assert len(fake.reads) == 1
+
+        # The refreshed entry is trusted
+        assert await profiles.get_profile("u2") == {"id": "u2", "role": "coder"}
+        assert len(fake.reads) == 1
+
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+import asyncio
+
+import pytest
+
+from app.schemas import ExecutionResult, Verdict
+from app.services import content_store
+from app.services import judge as judge_module
+from app.services import rejudge
+
+
+def test_throttle_takes_one_token_per_executor_run(monkeypatch):
+    taken = []
+    running = {"now": 0, "peak": 0}
+
+    async def take(key, capacity, refill_per_second, tokens=1):
+        taken.append(tokens)
+        return True
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0)
+        running["now"] -= 1
+        return ExecutionResult(verdict=Verdict.AC, stdout=stdin)
+
+    monkeypatch.setattr(rejudge.shared_state, "take", take)
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+
+    testcases = [{"id": f"t{i}", "input": str(i), "expected_output": str(i)} for i in range(100)]
+    rejudger = rejudge.Rejudger()
+    judged = asyncio.run(judge_module.judge("python", "code", testcases, concurrency=1, before_run=rejudger._throttle))
+
+    assert judged["all_passed"]
+    assert taken == [1] * 100
+    assert running["peak"] == 1
+
+
+def test_throttle_waits_for_tokens(monkeypatch):
+    answers = iter([False, False, True])
+    sleeps = []
+
+    async def take(key, capacity, refill_per_second, tokens=1):
+        return next(answers)
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(rejudge.shared_state, "take", take)
+    monkeypatch.setattr(rejudge.asyncio, "sleep", sleep)
+    asyncio.run(rejudge.Rejudger()._throttle())
+    assert len(sleeps) == 2
+
+
+EXPIRED = "2000-01-01T00:00:00+00:00"
+
+
+def _tables(*submissions):
+    return {
+        "testcases": [{"id": "t-new", "problem_id": "p1", "input": "1", "expected_output": "1", "points": 10}],
+        "problems": [{"id": "p1"}],
+        "submissions": [{"problem_id": "p1", "passed": True, **sub} for sub in submissions],
+    }
+
+
+def _patches(fake):
+    return [write for write in fake.writes if write[0] == "patch" and write[1] != "rejudge_jobs"]
+
+
+def _job(fake, job_id):
+    return next(job for job in fake.tables["rejudge_jobs"] if job["id"] == job_id)
+
+
+def test_unreadable_code_is_skipped_not_failed(monkeypatch, fake_supabase):
+    fake = fake_supabase(_tables(
+        {"id": "s1", "user_id": "u1", "language_slug": "py", "code": "", "code_hash": "ab" * 32},
+        {"id": "s2", "user_id": "u2", "language_slug": "py", "code": "wrong", "code_hash": None},
+    ), rejudge, content_store)
+    monkeypatch.setattr("app.services.catalog.catalog._languages", {"py": {"slug": "py", "executor_key": "python"}})
+    monkeypatch.setattr("app.services.catalog.catalog._languages_at", float("inf"))
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        return ExecutionResult(verdict=Verdict.AC, stdout="2")
+
+    async def reconcile():
+        pass
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    monkeypatch.setattr(rejudge.leaderboard, "reconcile", reconcile)
+
+    async def main():
+        rejudger = rejudge.Rejudger()
+        job = await rejudger.enqueue("p1", ["t-new"])
+        await rejudger.run_pending()
+        return _job(fake, job["id"])
+
+    job = asyncio.run(main())
+    assert job["status"] == "done"
+    assert job["skipped"] == ["s1"]
+    assert job["checked"] == 1 and job["failed"] == 1
+    patches = _patches(fake)
+    assert ("patch", "submissions", {"id": "in.(s2)"}, {"passed": False, "verdict": "WA"}) in patches
+    assert ("patch", "user_progress", {"problem_id": "eq.p1", "user_id": "in.(u2)"}, {"solved": False}) in patches
+
+
+def test_a_job_runs_in_one_worker_until_its_lease_runs_out(fake_supabase):
+    fake = fake_supabase({}, rejudge)
+
+    async def main():
+        first, second = rejudge.Rejudger(), rejudge.Rejudger()
+        second.owner = "other-instance:1"
+        job = await first.enqueue("p1", ["t-new"])
+
+        claimed = await first._claim(job["id"])
+        assert claimed["lease_owner"] == first.owner
+        assert await second._claim(job["id"]) is None
+
+        # The first worker stalls past its lease; the second takes over
+        _job(fake, job["id"])["lease_until"] = EXPIRED
+        assert (await second._claim(job["id"]))["lease_owner"] == "other-instance:1"
+        with pytest.raises(rejudge.LeaseLost):
+            await first._save(claimed)
+
+    asyncio.run(main())
+
+
+def test_executor_failure_pauses_the_job_without_unaccepting(monkeypatch, fake_supabase):
+    fake = fake_supabase(_tables(
+        {"id": "s1", "user_id": "u1", "language_slug": "py", "code": "right", "code_hash": None},
+        {"id": "s2", "user_id": "u2", "language_slug": "py", "code": "wrong", "code_hash": None},
+    ), rejudge)
+    monkeypatch.setattr("app.services.catalog.catalog._languages", {"py": {"slug": "py", "executor_key": "python"}})
+    monkeypatch.setattr("app.services.catalog.catalog._languages_at", float("inf"))
+    executor = {"up": False}
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        if code == "right":
+            return ExecutionResult(verdict=Verdict.AC, stdout="1")
+        if not executor["up"]:
+            return ExecutionResult(verdict=Verdict.IE, stderr="Piston timed out")
+        return ExecutionResult(verdict=Verdict.WA, stdout="2")
+
+    async def reconcile():
+        pass
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    monkeypatch.setattr(rejudge.leaderboard, "reconcile", reconcile)
+
+    async def main():
+        rejudger = rejudge.Rejudger()
+        job = await rejudger.enqueue("p1", ["t-new"])
+        await rejudger.run_pending()
+        paused = dict(_job(fake, job["id"]))
+        paused_writes = _patches(fake)
+
+        # Held until its retry time, then resumed
+        await rejudger.run_pending()
+        assert _patches(fake) == paused_writes
+        _job(fake, job["id"])["lease_until"] = EXPIRED
+        executor["up"] = True
+        await rejudger.run_pending()
+        return paused, paused_writes, _job(fake, job["id"])
+
+    paused, paused_writes, finished = asyncio.run(main())
+    # s1 was judged and checkpointed; s2 is left for the retry
+    assert paused["status"] == "pending"
+    assert paused["cursor"] == "s1" and paused["checked"] == 1 and paused["failed"] == 0
+    assert "s2" in paused["error"]
+    assert paused["lease_until"] is not None and paused["finished_at"] is None
+    assert not any("passed" in write[3] or "solved" in write[3] for write in paused_writes)
+
+    assert finished["status"] == "done" and finished["error"] is None
+    assert finished["checked"] == 2 and finished["failed"] == 1
+    unaccepts = [write for write in _patches(fake) if not {"score", "best_score"} & set(write[3])]
+    assert unaccepts == [
+        ("patch", "submissions", {"id": "in.(s2)"}, {"passed": False, "verdict": "WA"}),
+        ("patch", "user_progress", {"problem_id": "eq.p1", "user_id": "in.(u2)"}, {"solved": False}),
+    ]
+
+
+def test_passing_submissions_gain_the_new_testcase_points(monkeypatch, fake_supabase):
+    fake = fake_supabase(_tables(
+        {"id": "s1", "user_id": "u1", "language_slug": "py", "code": "right", "code_hash": None, "score": 30},
+        {"id": "s2", "user_id": "u1", "language_slug": "py", "code": "right", "code_hash": None, "score": 20},
+        {"id": "s3", "user_id": "u2", "language_slug": "py", "code": "right", "code_hash": None, "score": 30},
+        {"id": "s4", "user_id": "u3", "language_slug": "py", "code": "wrong", "code_hash": None, "score": 30},
+    ), rejudge)
+    monkeypatch.setattr("app.services.catalog.catalog._languages", {"py": {"slug": "py", "executor_key": "python"}})
+    monkeypatch.setattr("app.services.catalog.catalog._languages_at", float("inf"))
+    monkeypatch.setattr(rejudge.settings, "REJUDGE_RUNS_PER_SECOND", 1000)
+    reconciled = []
+
+    async def run_code(language, code, stdin, version="*", limits=None):
+        return ExecutionResult(verdict=Verdict.AC, stdout="1" if code == "right" else "2")
+
+    async def reconcile():
+        reconciled.append(True)
+
+    monkeypatch.setattr(judge_module, "run_code", run_code)
+    monkeypatch.setattr(rejudge.leaderboard, "reconcile", reconcile)
+
+    async def main():
+        rejudger = rejudge.Rejudger()
+        await rejudger.enqueue("p1", ["t-new"])
+        await rejudger.run_pending()
+
+    asyncio.run(main())
+    patches = [write[1:] for write in _patches(fake) if {"score", "best_score"} & set(write[3])]
+    assert ("submissions", {"id": "in.(s1,s3)"}, {"score": 40}) in patches
+    assert ("submissions", {"id": "in.(s2)"}, {"score": 30}) in patches
+    # best_score only moves up, and failing submissions gain nothing
+    assert ("user_progress", {"problem_id": "eq.p1", "user_id": "in.(u1,u2)", "best_score": "lt.40"}, {"best_score": 40}) in patches
+    assert len(patches) == 3
+    assert reconciled
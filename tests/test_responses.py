@@ -0,0 +1,19 @@
+import json
+
+from app.schemas import ExecutionLimits
+from app.services.responses import _accepted_encodings, dumps
+
+
+def test_accept_encoding_with_quality_values():
+    assert _accepted_encodings("gzip, deflate;q=0.5, BR;q=0.9") == {"gzip": 1.0, "deflate": 0.5, "br": 0.9}
+
+
+def test_accept_encoding_edge_cases():
+    assert _accepted_encodings("") == {}
+    assert _accepted_encodings("gzip;q=0") == {"gzip": 0.0}
+    assert _accepted_encodings("gzip;q=bad, , identity") == {"gzip": 0.0, "identity": 1.0}
+
+
+def test_dumps_handles_models_and_sets():
+    body = json.loads(dumps({"limits": ExecutionLimits(time_ms=1000), "tags": {"dp"}}))
+    assert body == {"limits": {"time_ms": 1000, "memory_kb": None}, "tags": ["dp"]}
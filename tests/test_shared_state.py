@@ -0,0 +1,126 @@
+import asyncio
+
+from app.services.shared_state import MemoryStore, SharedState, _handle_client
+
+
+async def _serve(tmp_path):
+    store = MemoryStore()
+    path = str(tmp_path / "state.sock")
+    server = await asyncio.start_unix_server(lambda r, w: _handle_client(store, r, w), path=path)
+    return server, SharedState(path)
+
+
+def test_cancelled_call_does_not_desync_replies(tmp_path):
+    async def main():
+        server, state = await _serve(tmp_path)
+        async with server:
+            await state.set("profile:admin", {"role": "admin"})
+            await state.set("profile:coder", {"role": "coder"})
+
+            # Cancel once the request is on the wire, before the reply is read
+            call = asyncio.create_task(state.get("profile:admin"))
+            await asyncio.sleep(0)
+            call.cancel()
+            try:
+                await call
+            except asyncio.CancelledError:
+                pass
+
+            assert await state.get("profile:coder") == {"role": "coder"}
+            assert await state.get("profile:admin") == {"role": "admin"}
+
+    asyncio.run(main())
+
+
+def test_concurrent_calls_get_their_own_replies(tmp_path):
+    async def main():
+        server, state = await _serve(tmp_path)
+        async with server:
+            for i in range(20):
+                await state.set(f"k{i}", i)
+            values = await asyncio.gather(*(state.get(f"k{i}") for i in range(20)))
+            assert values == list(range(20))
+
+    asyncio.run(main())
+
+
+def test_falls_back_to_local_store_without_server(tmp_path):
+    async def main():
+        state = SharedState(str(tmp_path / "missing.sock"))
+        await state.set("k", 1)
+        assert await state.get("k") == 1
+
+    asyncio.run(main())
+
+
+def test_token_bucket():
+    store = MemoryStore()
+    assert store.take("bucket", capacity=2, refill_per_second=0, tokens=1)
+    assert store.take("bucket", capacity=2, refill_per_second=0, tokens=1)
+    assert not store.take("bucket", capacity=2, refill_per_second=0, tokens=1)
+
+
+def test_token_bucket_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.shared_state.time.monotonic", lambda: now[0])
+    store = MemoryStore()
+    assert store.take("bucket", capacity=2, refill_per_second=1, tokens=2)
+    assert not store.take("bucket", capacity=2, refill_per_second=1, tokens=1)
+    now[0] += 1.5
+    assert store.take("bucket", capacity=2, refill_per_second=1, tokens=1)
+    assert not store.take("bucket", capacity=2, refill_per_second=1, tokens=1)
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(max_entries=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("a") == 1
+    assert store.get("b") is None
+    assert store.get("c") == 3
+
+
+def test_leases_are_capped_and_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.shared_state.time.monotonic", lambda: now[0])
+    store = MemoryStore()
+    assert store.acquire("slots", 2, "a", ttl=10)
+    assert store.acquire("slots", 2, "b", ttl=10)
+    assert not store.acquire("slots", 2, "c", ttl=10)
+    assert store.holders("slots") == 2
+
+    assert store.release("slots", "a")
+    assert store.acquire("slots", 2, "c", ttl=10)
+
+    # A holder that never releases loses its slot when the lease runs out
+    now[0] += 11
+    assert store.holders("slots") == 0
+    assert store.acquire("slots", 2, "d", ttl=10)
+
+
+def test_shared_semaphore_limits_all_workers_together(tmp_path, monkeypatch):
+    from app.services import shared_state as shared_state_module
+
+    async def main():
+        server, state = await _serve(tmp_path)
+        monkeypatch.setattr(shared_state_module, "shared_state", state)
+        # Two workers, each with its own semaphore object, sharing 3 slots
+        workers = [shared_state_module.SharedSemaphore("slots:test", 3, ttl=30, poll_seconds=0.001) for _ in range(2)]
+        running = {"now": 0, "peak": 0}
+
+        async def run(slots):
+            async with slots.slot():
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+                await asyncio.sleep(0.01)
+                running["now"] -= 1
+
+        async with server:
+            await asyncio.gather(*(run(workers[i % 2]) for i in range(12)))
+            assert running["peak"] == 3
+            assert await state.holders("slots:test") == 0
+            assert not await workers[0].locked()
+
+    asyncio.run(main())
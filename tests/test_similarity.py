@@ -0,0 +1,60 @@
+import asyncio
+
+from app.services import similarity
+from app.services.similarity import LSHIndex, NUM_PERMUTATIONS, estimate_similarity, minhash
+
+SOLUTION = """
+def solve(nums):
+    total = 0
+    for n in nums:
+        if n % 2 == 0:
+            total += n
+    return total
+print(solve(list(map(int, input().split()))))
+"""
+
+
+def test_minhash_ignores_renames_and_comments():
+    renamed = SOLUTION.replace("total", "acc").replace("nums", "xs") + "# sum of evens\n"
+    assert minhash(SOLUTION) == minhash(renamed)
+    assert len(minhash(SOLUTION)) == NUM_PERMUTATIONS
+
+
+def test_minhash_of_empty_code_is_none():
+    assert minhash("") is None
+    assert minhash("# only a comment\n") is None
+
+
+def test_different_code_scores_lower():
+    other = "import sys\nfor line in sys.stdin:\n    a, b = line.split()\n    print(int(a) * int(b))\n"
+    assert estimate_similarity(minhash(SOLUTION), minhash(SOLUTION)) == 1.0
+    assert estimate_similarity(minhash(SOLUTION), minhash(other)) < 0.5
+
+
+def test_lsh_query_excludes_own_user_and_submission():
+    index = LSHIndex()
+    signature = minhash(SOLUTION)
+    index.add("s1", "alice", signature)
+    index.add("s2", "bob", signature)
+    index.add("s3", "alice", minhash(SOLUTION + "print(1)\n"))
+
+    matches = index.query(signature, k=10, exclude_user="alice", exclude_id="s2")
+    assert matches == []
+
+    matches = index.query(signature, k=10, exclude_id="s1")
+    assert [m["submission_id"] for m in matches][0] == "s2"
+    assert matches[0]["similarity"] == 1.0
+
+
+def test_rebuild_writes_back_legacy_signatures(fake_supabase):
+    submission = {"problem_id": "p1", "language_slug": "python", "passed": True}
+    fake = fake_supabase({"submissions": [
+        {**submission, "id": "s1", "user_id": "u1", "minhash": list(minhash(SOLUTION))},
+        {**submission, "id": "s2", "user_id": "u2", "minhash": None, "code": SOLUTION},
+        {**submission, "id": "s3", "user_id": "u3", "minhash": None, "code": SOLUTION, "passed": False},
+    ]}, similarity)
+
+    index = asyncio.run(similarity.SimilarityIndex()._ensure("p1", "python"))
+
+    assert set(index.signatures) == {"s1", "s2"}
+    assert fake.writes == [("patch", "submissions", {"id": "eq.s2"}, {"minhash": list(minhash(SOLUTION))})]
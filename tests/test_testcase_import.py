@@ -0,0 +1,113 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+from app.services.testcase_import import UploadTooLarge, aiter_zip, iter_ndjson, iter_zip, limit_size, spool_upload
+
+MEMBER_LIMIT = 1024
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(entries):
+    return [entry async for entry in entries]
+
+
+def test_ndjson_lines_split_across_chunks():
+    body = b'{"input": "1 2", "expected_output": "3"}\n\n{"input": "4 5", "expec' + b'ted_output": "9", "points": 5}'
+    entries = asyncio.run(_collect(iter_ndjson(_chunks(body[:10], body[10:50], body[50:]))))
+
+    assert [label for label, _, _ in entries] == ["line 1", "line 3"]
+    assert entries[1][1].points == 5
+    assert all(error is None for _, _, error in entries)
+
+
+def test_ndjson_long_line_in_many_small_chunks():
+    body = json.dumps({"input": "x" * 5000, "expected_output": "y"}).encode() + b"\n\n" + b'{"input": "1", "expected_output": "1"}'
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    entries = asyncio.run(_collect(iter_ndjson(_chunks(*chunks))))
+
+    assert [label for label, _, _ in entries] == ["line 1", "line 3"]
+    assert entries[0][1].input == "x" * 5000
+    assert entries[1][1].expected_output == "1"
+
+
+def test_ndjson_reports_bad_lines_and_keeps_going():
+    body = b'not json\n[1, 2]\n{"input": "x"}\n{"input": "1", "expected_output": "1"}\n'
+    entries = asyncio.run(_collect(iter_ndjson(_chunks(body))))
+
+    assert entries[0][2].startswith("Invalid JSON")
+    assert entries[1][2] == "Expected a JSON object"
+    assert "expected_output" in entries[2][2]
+    assert entries[3][1] is not None
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_pairs_inputs_with_outputs():
+    archive = _zip({
+        "tests/01.in": "1 2\n",
+        "tests/01.out": "3\n",
+        "tests/sample1.in": "0 0\n",
+        "tests/sample1.out": "0\n",
+        "tests/02.in": "orphan\n",
+        "README.md": "ignored",
+    })
+    entries = {label: (item, error) for label, item, error in iter_zip(archive, MEMBER_LIMIT)}
+
+    assert set(entries) == {"tests/01", "tests/02", "tests/sample1"}
+    assert entries["tests/01"][0].expected_output == "3\n"
+    assert not entries["tests/01"][0].is_sample
+    assert entries["tests/sample1"][0].is_sample
+    assert entries["tests/02"] == (None, "Missing tests/02.out")
+
+
+def test_zip_rejects_non_archives_and_bad_utf8():
+    assert list(iter_zip(io.BytesIO(b"not a zip"), MEMBER_LIMIT))[0][2].startswith("Invalid zip file")
+
+    label, item, error = list(iter_zip(_zip({"a.in": b"\xff\xfe", "a.out": "1"}), MEMBER_LIMIT))[0]
+    assert item is None and "UTF-8" in error
+
+
+def test_zip_rejects_oversized_members_without_reading_them():
+    archive = _zip({"big.in": "1" * (MEMBER_LIMIT + 1), "big.out": "1", "ok.in": "1", "ok.out": "1"})
+    entries = {label: (item, error) for label, item, error in iter_zip(archive, MEMBER_LIMIT)}
+
+    assert entries["big"] == (None, f"big.in exceeds {MEMBER_LIMIT} bytes")
+    assert entries["ok"][0].input == "1"
+
+
+def test_async_zip_matches_sync_zip():
+    files = {f"{i:02}.{ext}": str(i) for i in range(5) for ext in ("in", "out")}
+    expected = list(iter_zip(_zip(files), MEMBER_LIMIT))
+    assert asyncio.run(_collect(aiter_zip(_zip(files), MEMBER_LIMIT))) == expected
+
+
+def test_spool_upload_is_readable_from_the_start():
+    spool = asyncio.run(spool_upload(_chunks(b"abc", b"def"), max_memory=4))
+    assert spool.read() == b"abcdef"
+    spool.close()
+
+
+def test_oversized_uploads_are_cut_off():
+    assert asyncio.run(_collect(limit_size(_chunks(b"12345", b"678"), 8))) == [b"12345", b"678"]
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(limit_size(_chunks(b"12345", b"6789"), 8), max_memory=4))
+
+    lines = json.dumps({"input": "1", "expected_output": "1"}).encode() + b"\n"
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(_collect(iter_ndjson(limit_size(_chunks(lines, lines), len(lines)))))